@@ -0,0 +1,216 @@
+"""Benchmarks for the droplet physics hot paths
+Each case is timed with timeit, the best time per call is reported
+in seconds. Results are written as JSON and compared against a stored
+baseline, cases slower than threshold * baseline fail.
+Run with `make bench`, refresh the baseline with `make bench-baseline`.
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import numpy
+from numpy import radians
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from droplet_pressure.droplet import Droplet, V_sym  # noqa: E402
+
+params = dict(initial_volume=3.0e-10,
+              theta_t=radians(145),
+              theta_b=radians(165))
+
+
+def case_init():
+    Droplet(**params).get_delta_stress()
+
+
+def make_case_h_assign(n):
+    drop = Droplet(**params)
+    hs = numpy.linspace(drop.h0, drop.h0 * 0.75, n)
+
+    def case():
+        for h in hs:
+            drop.h = h
+            drop.r1
+    return case
+
+
+def make_case_delta_stress(n):
+    drop = Droplet(**params)
+    drop.h = drop.h0 * 0.8
+
+    def case():
+        for _ in range(n):
+            drop.get_delta_stress(gravity=True)
+    return case
+
+
+def make_case_v_sym(n):
+    R = numpy.linspace(1e-4, 1e-3, n)
+
+    def case():
+        V_sym(R, 2e-4, radians(145))
+    return case
+
+
+def make_case_solve_heights(n):
+    drop = Droplet(**params)
+    hs = numpy.linspace(drop.h0, drop.h0 * 0.75, n)
+
+    def case():
+        drop.solve_heights(hs)
+    return case
+
+
+def make_case_gravity(n):
+    from droplet_pressure.gravity import GravityDroplet
+    drop = GravityDroplet(rho=13.6e3, **params)
+    hs = numpy.linspace(drop.h0, drop.h0 * 0.75, n)
+
+    def case():
+        # Cold start, the warm start is reset on every call
+        GravityDroplet(rho=13.6e3, **params).solve_heights(hs)
+    return case
+
+
+def make_case_animation(n):
+    """Frames of the pressure animation as main builds them, the
+    artists are updated but not rendered
+    """
+    import matplotlib.pyplot as plt
+    from examples.pressure_animation import gen_frames, setup_figure, \
+        draw_frame
+    drop = Droplet(**params)
+    fig, patches = setup_figure(gen_frames(drop, total_frames=n),
+                                style=None)
+    plt.close(fig)
+
+    def case():
+        frames = gen_frames(drop, total_frames=n)
+        for i in range(n):
+            draw_frame(patches, frames, i)
+    return case
+
+
+def make_case_import(modules):
+    """Fresh interpreter importing the modules, includes the
+    interpreter start-up
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-c",
+               "; ".join("import " + m for m in modules)]
+
+    def case():
+        subprocess.check_call(command, cwd=root)
+    return case
+
+
+def make_case_gen_params(n):
+    from examples.blender_gen_geometry import gen_params
+    drop = Droplet(**params)
+    hs = numpy.linspace(drop.h0, drop.h0 * 0.75, n)
+
+    def case():
+        for h in hs:
+            gen_params(drop, h)
+    return case
+
+
+def cases():
+    """Name and callable of every benchmark case
+    """
+    yield "import_python", make_case_import(["sys"])
+    yield "import_droplet", make_case_import(["droplet_pressure.droplet"])
+    yield "import_package", make_case_import(
+        ["droplet_pressure." + m for m in ("droplet", "sweep", "schedule",
+                                           "parallel", "cache", "tables",
+                                           "export", "stats", "report")])
+    yield "droplet_init", case_init
+    for n in (100, 1000):
+        yield "h_assign_{}".format(n), make_case_h_assign(n)
+    yield "get_delta_stress_1000", make_case_delta_stress(1000)
+    for n in (1000, 100000):
+        yield "v_sym_{}".format(n), make_case_v_sym(n)
+    for n in (1000, 10000, 100000):
+        yield "solve_heights_{}".format(n), make_case_solve_heights(n)
+    for n in (100, 1000):
+        yield "gravity_heights_{}".format(n), make_case_gravity(n)
+    for n in (56, 560):
+        yield "animation_frames_{}".format(n), make_case_animation(n)
+    for n in (100, 1000):
+        yield "gen_params_{}".format(n), make_case_gen_params(n)
+
+
+def run(repeat=5, select=None):
+    """Time all cases, returns {name: best seconds per call}
+    """
+    results = dict()
+    for name, case in cases():
+        if select is not None and select not in name:
+            continue
+        timer = timeit.Timer(case)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=number)) / number
+        results[name] = best
+        print("{:<28s}{:>12.3e} s".format(name, best))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Names of the cases slower than threshold * baseline
+    """
+    slow = []
+    for name, t in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = t / baseline[name]
+        flag = "SLOWER" if ratio > threshold else ""
+        print("{:<28s}{:>8.2f}x {}".format(name, ratio, flag))
+        if ratio > threshold:
+            slow.append(name)
+    return slow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default="bench_output.json",
+                        help="JSON file for the results")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=2.0,
+                        help="allowed slowdown relative to the baseline")
+    parser.add_argument("--update", action="store_true",
+                        help="write the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-k", dest="select", default=None,
+                        help="only run cases containing this string")
+    args = parser.parse_args(argv)
+    results = run(repeat=args.repeat, select=args.select)
+    report = dict(python=platform.python_version(),
+                  numpy=numpy.__version__,
+                  machine=platform.machine(),
+                  results=results)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline is None:
+        return 0
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    slow = compare(results, baseline, args.threshold)
+    if slow:
+        print("Performance regression in: {}".format(", ".join(slow)),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
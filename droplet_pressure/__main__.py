@@ -0,0 +1,4 @@
+import sys
+from droplet_pressure.cli import main
+
+sys.exit(main())
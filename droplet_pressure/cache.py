@@ -0,0 +1,99 @@
+from __future__ import print_function
+import os
+import pickle
+from collections import OrderedDict
+from math import ceil, log10
+from droplet_pressure.droplet import solve_r1
+
+"""Memoized r1 solutions
+Opt-in cache keyed on the quantized droplet geometry
+(v0, theta_t, theta_b, h), with bounded LRU eviction and optional
+persistence to disk.
+"""
+
+
+class R1Cache(object):
+    """Parameters
+    maxsize: maximal number of entries, least recently used are evicted
+    rtol: relative quantization tolerance of the keys, geometries
+          agreeing within rtol share the same r1
+    path: optional file for persisting the cache between runs,
+          loaded on construction if it exists
+    """
+
+    def __init__(self, maxsize=65536, rtol=1e-10, path=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        if not 0 < rtol < 1:
+            raise ValueError("rtol must be between 0 and 1")
+        self.maxsize = int(maxsize)
+        self.rtol = rtol
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.__digits = int(ceil(-log10(rtol)))
+        self.__data = OrderedDict()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.__data)
+
+    def key(self, v0, theta_t, theta_b, h):
+        """Quantize the geometry to rtol significant digits
+        """
+        return tuple("{:.{}e}".format(float(x), self.__digits)
+                     for x in (v0, theta_t, theta_b, h))
+
+    def solve(self, v0, theta_t, theta_b, h, check=False):
+        """Cached version of solve_r1 for scalar geometries
+        """
+        key = self.key(v0, theta_t, theta_b, h)
+        try:
+            r1 = self.__data[key]
+        except KeyError:
+            self.misses += 1
+            r1 = float(solve_r1(h, v0, theta_t, theta_b, check=check))
+            self.__data[key] = r1
+            if len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+        else:
+            self.hits += 1
+            self.__data.move_to_end(key)
+        return r1
+
+    def stats(self):
+        """Hit / miss statistics
+        """
+        total = self.hits + self.misses
+        return dict(hits=self.hits,
+                    misses=self.misses,
+                    size=len(self.__data),
+                    hit_rate=self.hits / total if total else 0.0)
+
+    def clear(self):
+        self.__data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path=None):
+        """Write the entries to disk, the quantization is stored along
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given to save the cache")
+        with open(path, "wb") as f:
+            pickle.dump((self.rtol, list(self.__data.items())), f)
+
+    def load(self, path=None):
+        """Merge entries from disk, skipped if quantized differently
+        """
+        path = path or self.path
+        with open(path, "rb") as f:
+            rtol, items = pickle.load(f)
+        if rtol != self.rtol:
+            return
+        for key, r1 in items:
+            self.__data[key] = r1
+        while len(self.__data) > self.maxsize:
+            self.__data.popitem(last=False)
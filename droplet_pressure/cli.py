@@ -0,0 +1,226 @@
+from __future__ import print_function
+import argparse
+import json
+import os
+import numpy
+from numpy.lib import recfunctions
+from droplet_pressure.droplet import gamma_0, initial_height, radians
+from droplet_pressure.sweep import fields, evaluate
+from droplet_pressure.export import ParamsWriter, read_params
+from droplet_pressure.parallel import SweepExecutor
+from droplet_pressure.report import get_logger, set_verbosity, Progress
+
+"""Command-line sweeps
+python -m droplet_pressure --volume 3e-10 --theta-t 145 --theta-b 165 \\
+    --strain 0:0.25:1000 --out results/sweep
+The outer product of the parameters is solved in shards of
+--shard-size points, each shard is written to its own file as soon as
+it is solved. --resume skips the shards already in the output
+directory, so an interrupted sweep continues where it stopped.
+"""
+
+log = get_logger("cli")
+
+# Sweep axes in the order of sweep.sweep, angles are given in degrees
+axes = ("volume", "theta_t", "theta_b", "gamma", "strain")
+defaults = dict(volume=3.0e-10, theta_t=180.0, theta_b=180.0,
+                gamma=gamma_0, strain=0.0,
+                out="sweep", fmt="bin", shard_size=100000, workers=1)
+manifest_name = "manifest.json"
+
+
+def parse_values(spec):
+    """Values of one axis
+    spec: number, list of numbers, "a,b,c" or "start:stop:num"
+    """
+    if isinstance(spec, (int, float)):
+        return [float(spec)]
+    if isinstance(spec, (list, tuple)):
+        return [float(x) for x in spec]
+    spec = str(spec).strip()
+    if ":" in spec:
+        start, stop, num = spec.split(":")
+        return numpy.linspace(float(start), float(stop),
+                              int(num)).tolist()
+    return [float(x) for x in spec.split(",")]
+
+
+def shard_name(index, fmt):
+    return "shard-{:05d}.{}".format(index, fmt)
+
+
+class ShardedSweep(object):
+    """Parameters
+    volume, theta_t, theta_b, gamma, strain: lists of values,
+        angles in degrees
+    out: output directory
+    fmt: "bin" or "csv" shards
+    shard_size: number of points per shard
+    Points are the C-ordered outer product of the axes, shard i holds
+    the points [i * shard_size, (i + 1) * shard_size).
+    """
+
+    def __init__(self, volume, theta_t, theta_b, gamma, strain,
+                 out="sweep", fmt="bin", shard_size=100000):
+        if fmt not in ("bin", "csv"):
+            raise ValueError("Unknown format {}".format(fmt))
+        if shard_size < 1:
+            raise ValueError("shard_size must be positive")
+        self.values = dict(zip(axes, (list(map(float, x)) for x in
+                                      (volume, theta_t, theta_b,
+                                       gamma, strain))))
+        self.out = out
+        self.fmt = fmt
+        self.shard_size = int(shard_size)
+        self.shape = tuple(len(self.values[a]) for a in axes)
+        self.points = int(numpy.prod(self.shape))
+        self.shards = -(-self.points // self.shard_size)
+
+    def manifest(self):
+        return dict(values=self.values, fmt=self.fmt,
+                    shard_size=self.shard_size, shards=self.shards,
+                    fields=list(fields))
+
+    def chunk(self, index):
+        """Parameter arrays of the points of shard index, in the
+        order of parallel.solve_chunk
+        """
+        start = index * self.shard_size
+        stop = min(start + self.shard_size, self.points)
+        grid_index = numpy.unravel_index(numpy.arange(start, stop),
+                                         self.shape)
+        v0, t_t, t_b, gm, st = (numpy.asarray(self.values[a])[i]
+                                for a, i in zip(axes, grid_index))
+        t_t, t_b = radians(t_t), radians(t_b)
+        return v0, t_t, t_b, gm, initial_height(v0, t_t, t_b) * (1 - st)
+
+    def done(self):
+        """Indices of the shards already written
+        """
+        return [i for i in range(self.shards)
+                if os.path.exists(self.path(i))]
+
+    def path(self, index):
+        return os.path.join(self.out, shard_name(index, self.fmt))
+
+    def run(self, resume=False, workers=1, progress=None):
+        """Solve and write the missing shards
+        resume: keep the shards of a previous run with the same
+                manifest, otherwise all shards are rewritten
+        workers: worker processes of the SweepExecutor
+        progress: optional callback(points_done, points_total)
+        Returns the number of shards solved
+        """
+        if not os.path.isdir(self.out):
+            os.makedirs(self.out)
+        manifest = self.manifest()
+        f_manifest = os.path.join(self.out, manifest_name)
+        if resume and os.path.exists(f_manifest):
+            with open(f_manifest) as f:
+                if json.load(f) != manifest:
+                    raise ValueError("{} belongs to a different "
+                                     "sweep".format(self.out))
+            todo = sorted(set(range(self.shards)) - set(self.done()))
+        else:
+            _write_atomic(f_manifest, json.dumps(manifest, indent=2,
+                                                 sort_keys=True))
+            todo = list(range(self.shards))
+        log.info("%d of %d shards to solve", len(todo), self.shards)
+        # Points of the shards kept from the previous run
+        skipped = self.points - sum(min(self.shard_size,
+                                        self.points - i * self.shard_size)
+                                    for i in todo)
+        executor = SweepExecutor(chunk_size=self.shard_size,
+                                 workers=workers)
+        if progress is not None:
+            progress(skipped, self.points)
+            executor.progress = lambda done, total: \
+                progress(skipped + done, self.points)
+        results = executor.imap_chunks((self.chunk(i) for i in todo),
+                                       self.points - skipped, len(todo))
+        for index, res in zip(todo, results):
+            self.write(index, res)
+        return len(todo)
+
+    def write(self, index, res):
+        """Write the structured array of a shard, the file only
+        appears under its final name once complete
+        """
+        part = self.path(index) + ".part"
+        table = recfunctions.structured_to_unstructured(res[list(fields)])
+        with ParamsWriter(part, cols=len(fields), fmt=self.fmt,
+                          names=fields) as writer:
+            writer.write(table, float_fmt="{:.17g}")
+        os.replace(part, self.path(index))
+
+    def read(self):
+        """All written shards as one structured array of the points
+        """
+        tables = [read_shard(self.path(i)) for i in self.done()]
+        if not tables:
+            return evaluate(*([numpy.empty(0)] * 7))
+        return numpy.concatenate(tables)
+
+
+def read_shard(f_name):
+    """Structured array of one shard file
+    """
+    if f_name.endswith(".csv"):
+        table = numpy.loadtxt(f_name, delimiter=",", ndmin=2)
+    else:
+        _, table = read_params(f_name, mmap=False)
+    return recfunctions.unstructured_to_structured(
+        table, dtype=[(f, float) for f in fields])
+
+
+def _write_atomic(f_name, text):
+    with open(f_name + ".part", "w") as f:
+        f.write(text)
+    os.replace(f_name + ".part", f_name)
+
+
+def parser():
+    p = argparse.ArgumentParser(
+        prog="python -m droplet_pressure",
+        description="Sweep the droplet model over the outer product of "
+        "the parameters. Values are a number, a list a,b,c or a range "
+        "start:stop:num.")
+    for a, unit in zip(axes, ("m^3", "degrees", "degrees", "N/m", "")):
+        p.add_argument("--" + a.replace("_", "-"), dest=a, default=None,
+                       help="{} {}".format(a, unit).strip())
+    p.add_argument("--config", default=None,
+                   help="JSON file with the same keys as the options, "
+                   "options given on the command line take precedence")
+    p.add_argument("--out", default=None, help="output directory")
+    p.add_argument("--fmt", choices=("bin", "csv"), default=None)
+    p.add_argument("--shard-size", dest="shard_size", type=int,
+                   default=None, help="points per shard")
+    p.add_argument("--workers", type=int, default=None,
+                   help="worker processes, 1 solves inline")
+    p.add_argument("--resume", action="store_true",
+                   help="skip the shards already written")
+    p.add_argument("-v", "--verbose", action="count", default=0)
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    options = dict(defaults)
+    if args.config is not None:
+        with open(args.config) as f:
+            config = json.load(f)
+        unknown = set(config) - set(defaults)
+        if unknown:
+            raise ValueError("Unknown keys in {}: {}".format(
+                args.config, ", ".join(sorted(unknown))))
+        options.update(config)
+    options.update((k, v) for k, v in vars(args).items()
+                   if k in defaults and v is not None)
+    if args.verbose:
+        set_verbosity(args.verbose)
+    job = ShardedSweep(*(parse_values(options[a]) for a in axes),
+                       out=options["out"], fmt=options["fmt"],
+                       shard_size=options["shard_size"])
+    job.run(resume=args.resume, workers=int(options["workers"]),
+            progress=Progress(job.points, name="points", log=log))
+    return 0
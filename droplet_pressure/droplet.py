@@ -1,12 +1,19 @@
 from __future__ import print_function
+from collections import namedtuple
 import numpy
 from numpy import sin, cos, tan, pi
 from numpy import radians
-from scipy.optimize import fsolve
-from scipy.constants import g
+from droplet_pressure import stats as _stats
 
 gamma_0 = 485e-3                # mercury surface tension
 rho = 13.6e-3                   # mercury density
+g = 9.80665                     # standard gravity, scipy.constants.g
+
+
+# Record yielded by Droplet.iter_strain
+StrainState = namedtuple("StrainState",
+                         ("h", "strain", "r1", "r2", "delta_t", "delta_b",
+                          "pressure", "pressure_gravity"))
 
 
 """Class for droplet
@@ -20,43 +27,127 @@ class Droplet(object):
     initial_volume: V_0
     theta_t, theta_b: contact angles in radians
     gamma: surface tension (SI unit)
+    check: cross-check the analytic r1 against fsolve
+    cache: optional R1Cache shared between droplets
+    stats: optional SolverStats recording the solves of this droplet
+    Derived values (h0, p0, r1, r2) are evaluated lazily and refreshed
+    when the parameters change. h follows h0 until it is assigned.
     """
 
     def __init__(self,
                  initial_volume,
                  theta_t=pi,
                  theta_b=pi,
-                 gamma=gamma_0):
+                 gamma=gamma_0,
+                 check=False,
+                 cache=None,
+                 stats=None):
+        self.__h = None
+        self.__kernel = None
         self.v0 = initial_volume
         self.theta_t = theta_t
         self.theta_b = theta_b
         self.gamma = gamma
-        self.__init_params()
+        self.check = check
+        self.cache = cache
+        self.stats = stats
+
+    def __invalidate(self, initial=True):
+        """Drop the derived values
+        initial: also drop those of the initial state
+        """
+        self.__r1 = None
+        self.__r2 = None
+        if initial:
+            self.__h0 = None
+            self.__p0 = None
+
+    @property
+    def v0(self):
+        return self.__v0
+
+    @v0.setter
+    def v0(self, v0):
+        self.__v0 = v0
+        self.__invalidate()
 
-    def __init_params(self):
-        self.h0 = self.__solve_initial_height()
-        self.h = self.h0
-        self.p0 = self.get_curve_pressure(gravity=False)
-        self.p0_gravity = self.get_curve_pressure(gravity=True)
+    @property
+    def theta_t(self):
+        return self.__theta_t
+
+    @theta_t.setter
+    def theta_t(self, theta_t):
+        self.__theta_t = theta_t
+        self.__kernel = None
+        self.__invalidate()
+
+    @property
+    def theta_b(self):
+        return self.__theta_b
+
+    @theta_b.setter
+    def theta_b(self, theta_b):
+        self.__theta_b = theta_b
+        self.__kernel = None
+        self.__invalidate()
+
+    @property
+    def gamma(self):
+        return self.__gamma
+
+    @gamma.setter
+    def gamma(self, gamma):
+        self.__gamma = gamma
+        self.__p0 = None
+
+    @property
+    def kernel(self):
+        """VolumeKernel of the contact angles
+        """
+        if self.__kernel is None:
+            self.__kernel = VolumeKernel(self.theta_t, self.theta_b)
+        return self.__kernel
+
+    @property
+    def h0(self):
+        if self.__h0 is None:
+            self.__h0 = self.__solve_initial_height()
+        return self.__h0
+
+    @property
+    def p0(self):
+        if self.__p0 is None:
+            self.__p0 = self.gamma * (1 / self.__solve_r1(self.h0)
+                                      + 1 / self.__solve_r2(self.h0))
+        return self.__p0
+
+    @property
+    def p0_gravity(self):
+        return self.p0 + rho * self.h0 * g
 
     @property
     def r1(self):
+        if self.__r1 is None:
+            self.__r1 = self.__solve_r1(self.h)
         return self.__r1
 
     @property
     def r2(self):
+        if self.__r2 is None:
+            self.__r2 = self.__solve_r2(self.h)
         return self.__r2
 
     @property
     def h(self):
+        if self.__h is None:
+            return self.h0
         return self.__h
 
     @h.setter
     def h(self, h):
         self.__h = h
-        # Update the calculated values of r1, r2 upon assign to h
-        self.__cal_r1()
-        self.__cal_r2()
+        # r1, r2 are evaluated upon next access
+        self.__invalidate(initial=False)
 
     """Get delta_t  and delta_b
     """ 
@@ -71,6 +162,125 @@ class Droplet(object):
             p += rho * self.h * g
         return p
 
+    def get_stress_derivative(self, gravity=False):
+        """d(pressure) / d(strain) at the current height
+        strain = 1 - h / h0, r1 is differentiated implicitly
+        """
+        return self.__stress_derivative(self.h, self.r1, gravity)
+
+    def get_modulus(self, gravity=False):
+        """Small-strain elastic modulus, d(stress) / d(strain) at h0
+        """
+        return self.__stress_derivative(self.h0,
+                                        self.__solve_r1(self.h0),
+                                        gravity)
+
+    def get_height_for_pressure(self, target, delta=False, gravity=False,
+                                h_min=None, h_max=None, num=256,
+                                tol=1e-12, maxiter=50):
+        """Inverse of get_curve_pressure (get_delta_stress if delta)
+        The pressure is tabulated on num heights within
+        [h_min, h_max] (default [0.1 * h0, h0]) to bracket each target,
+        then refined by a safeguarded Newton step.
+        target: scalar or array, returns h of the same shape
+        """
+        h_min = 0.1 * self.h0 if h_min is None else h_min
+        h_max = self.h0 if h_max is None else h_max
+        offset = (self.p0_gravity if gravity else self.p0) if delta else 0
+        target = numpy.asarray(target, dtype=float) + offset
+        hs = numpy.linspace(h_min, h_max, num)
+        *_, ps = self.solve_heights(hs, gravity=gravity)
+        # Compression increases the pressure
+        if not numpy.all(numpy.diff(ps) < 0):
+            raise ValueError("Pressure is not monotone within "
+                             "[{}, {}]".format(h_min, h_max))
+        if numpy.any(target > ps[0]) or numpy.any(target < ps[-1]):
+            raise ValueError("Target pressure outside of "
+                             "[{}, {}]".format(ps[-1], ps[0]))
+        i = numpy.clip(numpy.searchsorted(-ps, -target) - 1, 0, num - 2)
+        lo, hi = hs[i], hs[i + 1]
+        # Linear guess inside the bracket
+        h = lo + (hi - lo) * (target - ps[i]) / (ps[i + 1] - ps[i])
+        with _stats.collect(self.stats):
+            for _ in range(maxiter):
+                r1 = solve_r1(h, self.v0, self.theta_t, self.theta_b,
+                              kernel=self.kernel)
+                p = self.gamma * (1 / r1 - (cos(self.theta_t)
+                                            + cos(self.theta_b)) / h)
+                dp = pressure_dh(h, r1, self.v0, self.theta_t, self.theta_b,
+                                 self.gamma, kernel=self.kernel)
+                if gravity:
+                    p = p + rho * h * g
+                    dp = dp + rho * g
+                # Keep the bracket, p is decreasing in h
+                lo = numpy.where(p > target, h, lo)
+                hi = numpy.where(p > target, hi, h)
+                h_new = h - (p - target) / dp
+                outside = ~((h_new > lo) & (h_new < hi))
+                h_new = numpy.where(outside, (lo + hi) / 2, h_new)
+                converged = numpy.all(numpy.abs(h_new - h) <= tol * h)
+                h = h_new
+                if converged:
+                    break
+        return h
+
+    def get_strain_for_pressure(self, target, delta=False, gravity=False,
+                                **kwargs):
+        """Strain 1 - h / h0 for the target pressure
+        """
+        h = self.get_height_for_pressure(target, delta=delta,
+                                         gravity=gravity, **kwargs)
+        return 1 - h / self.h0
+
+    def solve_heights(self, h, gravity=False):
+        """Batched solve over an array of heights
+        Returns arrays of r1, r2, delta_t, delta_b and the curve pressure.
+        The current state (self.h) is left untouched.
+        """
+        h = numpy.asarray(h, dtype=float)
+        delta_t, delta_b = split_h(h, self.theta_t, self.theta_b)
+        with _stats.collect(self.stats):
+            r1 = solve_r1(h, self.v0, self.theta_t, self.theta_b,
+                          check=self.check, kernel=self.kernel)
+        r2 = -h / (cos(self.theta_t) + cos(self.theta_b))
+        p = self.gamma * (1 / r1 + 1 / r2)
+        if gravity:
+            p += rho * h * g
+        return r1, r2, delta_t, delta_b, p
+
+    def iter_strain(self, strains, continuation=None):
+        """Lazily yield a StrainState for each strain of the schedule
+        strains: any iterable, may be open-ended
+        continuation: optional Continuation solving r1 along the path
+        Otherwise each r1 solve is seeded with the previous solution.
+        The current state (self.h) is left untouched.
+        """
+        r1 = None
+        base = cos(self.theta_t) + cos(self.theta_b)
+        for strain in strains:
+            h = self.h0 * (1 - strain)
+            if continuation is not None:
+                r1 = continuation.solve(h)
+            else:
+                r1 = self.__solve_r1(h, x0=r1)
+            r2 = -h / base
+            delta_t, delta_b = split_h(h, self.theta_t, self.theta_b)
+            p = self.gamma * (1 / r1 + 1 / r2)
+            yield StrainState(h, strain, r1, r2, delta_t, delta_b,
+                              p, p + rho * h * g)
+
+    def get_profiles(self, h, resolution=64):
+        """Right meridian of the droplet for an array of heights
+        Returns vertices (frames, resolution, 2) from the bottom to the
+        top contact point, the centers (frames, 2) of the meridian
+        circles and their radii r2
+        """
+        r1, r2, delta_t, delta_b, _ = self.solve_heights(h)
+        centers = numpy.stack((r1 - r2, delta_b), axis=-1)
+        verts = arc_profiles(centers, r2, self.theta_t, self.theta_b,
+                             resolution=resolution)
+        return verts, centers, r2
+
     def get_delta_stress(self, gravity=False):
         p = self.get_curve_pressure(gravity=gravity)
         # delta to initial state
@@ -79,49 +289,103 @@ class Droplet(object):
         else:
             return p - self.p0
 
-    def __cal_r1(self):
-        """calculate r1 using fsolve
+    def __solve_r1(self, h, x0=None):
+        """calculate r1 from the quadratic volume equation
         Required ingredients:
         v, h, theta_t, theta_b
+        x0: initial guess if the iterative fallback is needed
         """
-        delta_t, delta_b = self.__split_h()
-        def _target(R):
-            V1 = V_sym(R, delta_t, self.theta_t)
-            V2 = V_sym(R, delta_b, self.theta_b)
-            return (V1 + V2) / 2 - self.v0
-        R_solution,  = fsolve(_target, x0=self.h)
-        # a1 = R_solution + delta * (1 - sin(theta1)) / (cos(theta1) + cos(theta2))
-        # a2 = R_solution + delta * (1 - sin(theta2)) / (cos(theta1) + cos(theta2))
-        # r = -delta / (cos(theta1) + cos(theta2))
-        self.__r1 = R_solution
-
-    def __cal_r2(self):
+        if self.stats is not None:
+            with _stats.collect(self.stats):
+                return self.__solve_r1_uncounted(h, x0)
+        return self.__solve_r1_uncounted(h, x0)
+
+    def __solve_r1_uncounted(self, h, x0=None):
+        if self.cache is not None:
+            return self.cache.solve(self.v0, self.theta_t,
+                                    self.theta_b, h,
+                                    check=self.check)
+        return float(solve_r1(h, self.v0,
+                              self.theta_t, self.theta_b,
+                              check=self.check, x0=x0,
+                              kernel=self.kernel))
+
+    def __stress_derivative(self, h, r1, gravity):
+        """d(pressure) / d(strain) at height h with solved r1
+        """
+        dp = pressure_dh(h, r1, self.v0, self.theta_t, self.theta_b,
+                         self.gamma, kernel=self.kernel)
+        if gravity:
+            dp = dp + rho * g
+        # d(strain) = -d(h) / h0
+        return -self.h0 * dp
+
+    def __solve_r2(self, h):
         """calculate r2
         Required ingredients:
         h, theta_t, theta_b
         """
-        self.__r2 = -self.h / (cos(self.theta_t) + cos(self.theta_b))
+        return -h / (cos(self.theta_t) + cos(self.theta_b))
 
     def __solve_initial_height(self):
         """Solve the h0 value
         """
-        def func_g(theta):
-            A = ((1 + cos(theta)) / 2) ** 2
-            B = 2 - cos(theta)
-            return A * B
-        h0 = (3 * self.v0 / 4 / pi) ** (1 / 3)
-        # Only the purely real values
-        h0 *= ((cos(self.theta_t) + cos(self.theta_b)) ** 3
-               / (func_g(self.theta_t) + func_g(self.theta_b) - 1)) ** (1 / 3)
-        return h0
-    
+        return initial_height(self.v0, self.theta_t, self.theta_b)
+
     def __split_h(self):
         """Split the height into delta_t and delta_b
         """
-        base = cos(self.theta_t) + cos(self.theta_b)
-        delta_t = self.h * cos(self.theta_t) / base
-        delta_b = self.h * cos(self.theta_b) / base
-        return delta_t, delta_b
+        return split_h(self.h, self.theta_t, self.theta_b)
+
+
+class Continuation(object):
+    """Warm-started r1 solves along a smooth path of heights
+    Parameters
+    drop: the Droplet
+    order: 0 seeds with the previous r1, 1 extrapolates linearly
+           from the previous two solutions
+    tol, maxiter: passed to newton_r1
+    Per-step records: h, r1, iterations, residuals
+    """
+
+    def __init__(self, drop, order=1, tol=1e-12, maxiter=50):
+        if order not in (0, 1):
+            raise ValueError("order must be 0 or 1")
+        self.drop = drop
+        self.order = order
+        self.tol = tol
+        self.maxiter = maxiter
+        self.h = []
+        self.r1 = []
+        self.iterations = []
+        self.residuals = []
+
+    def predict(self, h):
+        """Initial guess of r1 at h from the previous steps
+        """
+        if len(self.r1) == 0:
+            return h
+        if self.order == 0 or len(self.r1) == 1 \
+                or self.h[-1] == self.h[-2]:
+            return self.r1[-1]
+        slope = (self.r1[-1] - self.r1[-2]) / (self.h[-1] - self.h[-2])
+        return self.r1[-1] + slope * (h - self.h[-1])
+
+    def solve(self, h):
+        """Solve r1 at the next height of the path
+        """
+        drop = self.drop
+        with _stats.collect(drop.stats):
+            r1, info = newton_r1(h, drop.v0, drop.theta_t, drop.theta_b,
+                                 x0=self.predict(h), tol=self.tol,
+                                 maxiter=self.maxiter, full_output=True,
+                                 kernel=drop.kernel)
+        r1 = float(r1)
+        self.h.append(h)
+        self.r1.append(r1)
+        self.iterations.append(info["iterations"])
+        self.residuals.append(float(info["residual"]))
+        return r1
 
 
 ##########################
@@ -157,6 +421,251 @@ def V_sym(R, delta, theta):
 
 
 
+def dV_sym(R, delta, theta):
+    """
+    Derivative of V_sym with respect to R
+    """
+    a = R + delta * (1 - sin(theta)) / cos(theta)
+    dV = 4 * pi * a * delta \
+        + 2 * pi * (delta / cos(theta)) ** 2 * f1(theta)
+    return dV
+
+
+def initial_height(v0, theta_t, theta_b):
+    """Height h0 of the undeformed droplet
+    """
+    def func_g(theta):
+        A = ((1 + cos(theta)) / 2) ** 2
+        B = 2 - cos(theta)
+        return A * B
+    h0 = (3 * v0 / 4 / pi) ** (1 / 3)
+    # Only the purely real values
+    h0 = h0 * ((cos(theta_t) + cos(theta_b)) ** 3
+               / (func_g(theta_t) + func_g(theta_b) - 1)) ** (1 / 3)
+    return h0
+
+
+def split_h(h, theta_t, theta_b):
+    """Split the height into delta_t and delta_b
+    """
+    base = cos(theta_t) + cos(theta_b)
+    delta_t = h * cos(theta_t) / base
+    delta_b = h * cos(theta_b) / base
+    return delta_t, delta_b
+
+
+def newton_r1(h, v0, theta_t, theta_b,
+              x0=None, tol=1e-12, maxiter=50, full_output=False,
+              kernel=None):
+    """Vectorized solve of r1 for an array of heights
+    Halley iteration on the asymmetric volume (VolumeKernel) = v0,
+    its second derivative in R is the constant 2 * pi * h.
+    x0 defaults to h, same as the scalar fsolve.
+    full_output: also return a dict with the number of iterations and
+                 the relative volume residual
+    kernel: VolumeKernel of the angles, built if not given
+    """
+    t0 = _stats.start()
+    h = numpy.asarray(h, dtype=float)
+    if kernel is None:
+        kernel = VolumeKernel(theta_t, theta_b)
+    if x0 is None:
+        R = h.copy()
+    else:
+        R = numpy.array(numpy.broadcast_to(x0, h.shape), dtype=float)
+    d2V = kernel.d2volume(R, h)
+
+    def _residual(R):
+        return kernel.volume(R, h) - v0
+    iterations = 0
+    F = _residual(R)
+    while iterations < maxiter \
+            and not numpy.all(numpy.abs(F) <= tol * numpy.abs(v0)):
+        dF = kernel.dvolume(R, h)
+        step = 2 * F * dF / (2 * dF ** 2 - F * d2V)
+        R = R - step
+        iterations += 1
+        F = _residual(R)
+        if numpy.all(numpy.abs(step) <= tol * numpy.abs(R)):
+            break
+    if t0 is not None:
+        _stats.stop(t0, "newton", points=R.size,
+                    evaluations=(iterations + 1) * R.size,
+                    failures=int(numpy.sum(~(numpy.abs(F)
+                                             <= tol * numpy.abs(v0)))))
+    if full_output:
+        return R, dict(iterations=iterations,
+                       residual=numpy.abs(F / v0))
+    return R
+
+
+def arc_profiles(center, r2, theta_t, theta_b, resolution=64):
+    """Meridian arcs for many frames in one broadcast
+    center: (..., 2) centers of the meridian circles
+    r2, theta_t, theta_b: broadcastable to center[..., 0]
+    Returns vertices (..., resolution, 2) from the bottom to the top
+    contact point
+    """
+    center = numpy.asarray(center, dtype=float)
+    r2, theta_t, theta_b = numpy.broadcast_arrays(r2, theta_t, theta_b,
+                                                  center[..., 0])[:3]
+    t = numpy.linspace(-(theta_b - pi / 2), (theta_t - pi / 2),
+                       resolution, axis=-1)
+    verts = numpy.stack((cos(t), sin(t)), axis=-1) * r2[..., None, None]
+    return verts + center[..., None, :]
+
+
+def angle_terms(theta):
+    """Terms of VolumeKernel depending on one contact angle only
+    Returns cos, sin, (1 - sin) / cos, f1 and f2 of theta
+    """
+    c, s = cos(theta), sin(theta)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        return c, s, (1 - s) / c, f1(theta), f2(theta)
+
+
+class VolumeKernel(object):
+    """Asymmetric droplet volume
+    (V_sym(R, delta_t, theta_t) + V_sym(R, delta_b, theta_b)) / 2
+    = pi * (h * R ** 2 + beta * h ** 2 * R + kappa * h ** 3)
+    beta and kappa only depend on the angles, so f1, f2 and the
+    trigonometric terms are evaluated once per pair of angles.
+    Vectorized over R and h (and the angles)
+    terms: angle_terms of theta_t and theta_b, computed if not given
+    """
+
+    def __init__(self, theta_t, theta_b, terms=None):
+        self.theta_t = theta_t
+        self.theta_b = theta_b
+        if terms is None:
+            terms = (angle_terms(theta_t), angle_terms(theta_b))
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            base = terms[0][0] + terms[1][0]
+            beta = 0
+            kappa = 0
+            for c, _, k, f, f_2 in terms:
+                u = c / base        # delta / h
+                beta = beta + 2 * u ** 2 * k + f / base ** 2
+                kappa = kappa + u ** 3 * k ** 2 \
+                    + u * (k * f + f_2) / base ** 2
+        self.base = base
+        self.beta = beta
+        self.kappa = kappa
+
+    def volume(self, R, h):
+        return pi * h * (R ** 2 + h * (self.beta * R + self.kappa * h))
+
+    def dvolume(self, R, h):
+        """Derivative of the volume with respect to R
+        """
+        return pi * h * (2 * R + self.beta * h)
+
+    def d2volume(self, R, h):
+        return 2 * pi * h
+
+    def coefficients(self, h, v0):
+        """Coefficients of A * R ** 2 + B * R + C = volume - v0
+        """
+        A = pi * h
+        B = A * self.beta * h
+        C = A * self.kappa * h ** 2 - v0
+        return A, B, C
+
+
+def quad_r1(h, v0, theta_t, theta_b, kernel=None):
+    """Coefficients of A * R ** 2 + B * R + C = 0
+    (V_sym(R, delta_t, theta_t) + V_sym(R, delta_b, theta_b)) / 2 - v0
+    is quadratic in R since a = R + delta * (1 - sin(theta)) / cos(theta)
+    kernel: VolumeKernel of the angles, built if not given
+    """
+    if kernel is None:
+        kernel = VolumeKernel(theta_t, theta_b)
+    return kernel.coefficients(h, v0)
+
+
+def dr1_dh(h, r1, v0, theta_t, theta_b, kernel=None):
+    """Derivative of r1 with respect to h along the volume constraint
+    Implicit differentiation of A * R ** 2 + B * R + C = 0, where
+    A ~ h, B ~ h ** 2 and C + v0 ~ h ** 3 (see quad_r1)
+    """
+    A, B, C = quad_r1(h, v0, theta_t, theta_b, kernel=kernel)
+    dG_dR = 2 * A * r1 + B
+    dG_dh = (A * r1 ** 2 + 2 * B * r1 + 3 * (C + v0)) / h
+    return -dG_dh / dG_dR
+
+
+def pressure_dh(h, r1, v0, theta_t, theta_b, gamma=gamma_0, kernel=None):
+    """Derivative of the curve pressure (no gravity) with respect to h
+    """
+    base = cos(theta_t) + cos(theta_b)
+    r2 = -h / base
+    dr1 = dr1_dh(h, r1, v0, theta_t, theta_b, kernel=kernel)
+    dr2 = -1 / base
+    return -gamma * (dr1 / r1 ** 2 + dr2 / r2 ** 2)
+
+
+def fsolve_r1(h, v0, theta_t, theta_b, x0=None):
+    """Scalar iterative solve of r1, x0 defaults to h
+    """
+    # scipy is only imported once a fallback is needed
+    from scipy.optimize import fsolve
+    t0 = _stats.start()
+    delta_t, delta_b = split_h(h, theta_t, theta_b)
+
+    def _target(R):
+        V1 = V_sym(R, delta_t, theta_t)
+        V2 = V_sym(R, delta_b, theta_b)
+        return (V1 + V2) / 2 - v0
+    (R_solution,), info, ier, _ = fsolve(_target, x0=h if x0 is None else x0,
+                                         full_output=True)
+    _stats.stop(t0, "fsolve", evaluations=info["nfev"],
+                failures=int(ier != 1))
+    return R_solution
+
+
+def solve_r1(h, v0, theta_t, theta_b, check=False, eps=1e-8, rtol=1e-6,
+             x0=None, kernel=None):
+    """Closed-form r1 taking the larger (physical) root of quad_r1
+    Falls back to fsolve_r1 when cos(theta_t) + cos(theta_b) is
+    within eps of zero or the quadratic has no real root.
+    check: compare against fsolve_r1 and raise RuntimeError beyond rtol
+    x0: initial guess of the fallback, default to h
+    kernel: VolumeKernel of the angles, built if not given
+    """
+    t0 = _stats.start()
+    h = numpy.asarray(h, dtype=float)
+    base = cos(theta_t) + cos(theta_b)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        A, B, C = quad_r1(h, v0, theta_t, theta_b, kernel=kernel)
+        D = B ** 2 - 4 * A * C
+        sqrt_D = numpy.sqrt(D)
+        # Avoid cancellation between -B and sqrt(D)
+        R = numpy.where(B >= 0,
+                        2 * C / (-B - sqrt_D),
+                        (-B + sqrt_D) / (2 * A))
+    degenerate = ~numpy.isfinite(R) | (D < 0) \
+        | (numpy.abs(base) < eps)
+    degenerate = numpy.broadcast_to(degenerate, R.shape)
+    if numpy.any(degenerate) or check:
+        R = numpy.array(R, dtype=float)
+        h_, v0_, t_t, t_b, x0_ = numpy.broadcast_arrays(
+            h, v0, theta_t, theta_b, numpy.nan if x0 is None else x0)
+        index = numpy.ndindex(R.shape) if check \
+            else map(tuple, numpy.argwhere(degenerate))
+        for i in index:
+            R_ref = fsolve_r1(h_[i], v0_[i], t_t[i], t_b[i],
+                              x0=None if numpy.isnan(x0_[i]) else x0_[i])
+            if degenerate[i]:
+                R[i] = R_ref
+            elif abs(R[i] - R_ref) > rtol * abs(R_ref):
+                raise RuntimeError("analytic r1 {} differs from "
+                                   "fsolve {}".format(R[i], R_ref))
+    if t0 is not None:
+        _stats.stop(t0, "closed_form", points=R.size,
+                    failures=int(numpy.sum(~numpy.isfinite(R))))
+    return R
+
+
 ####################################
 # Dummy function only for test use #
 ####################################
@@ -0,0 +1,116 @@
+from __future__ import print_function
+import numpy
+
+"""Export of per-frame droplet parameters
+Binary format: flat little-endian float64 file, a header of
+`header_size` values (see `header_fields`) followed by the
+rows x cols table. It can be numpy.memmap'ed directly.
+The text (csv) format is kept for compatibility.
+"""
+
+version = 1
+header_fields = ("version", "rows", "cols",
+                 "h0", "volume", "theta_t", "theta_b", "gamma")
+header_size = len(header_fields)
+dtype = numpy.dtype("<f8")
+csv_header = "#Percentage,x0,y0,r2,theta_b,theta_t\n"
+
+
+class ParamsWriter(object):
+    """Streaming writer of the parameter table, rows are written as
+    they come and the row count is patched into the header on close
+    Parameters
+    f_name: output file
+    cols: number of columns
+    fmt: "bin" or "csv"
+    h0, volume, theta_t, theta_b, gamma: header values (bin only)
+    names: column names of the csv header, default to csv_header
+    """
+
+    def __init__(self, f_name, cols=6, fmt="bin",
+                 h0=numpy.nan, volume=numpy.nan,
+                 theta_t=numpy.nan, theta_b=numpy.nan, gamma=numpy.nan,
+                 names=None):
+        if fmt not in ("bin", "csv"):
+            raise ValueError("Unknown format {}".format(fmt))
+        self.fmt = fmt
+        self.cols = cols
+        self.rows = 0
+        self.__header = [version, 0, cols,
+                         h0, volume, theta_t, theta_b, gamma]
+        if fmt == "bin":
+            self.__f = open(f_name, "wb")
+            numpy.array(self.__header, dtype=dtype).tofile(self.__f)
+        else:
+            self.__f = open(f_name, "w")
+            if names is None:
+                self.__f.write(csv_header)
+            else:
+                self.__f.write("#" + ",".join(names) + "\n")
+
+    def write(self, rows, float_fmt="{:.3f}"):
+        """Append one row or a (n, cols) block
+        """
+        rows = numpy.atleast_2d(numpy.asarray(rows, dtype=dtype))
+        if rows.shape[1] != self.cols:
+            raise ValueError("Expected {} columns".format(self.cols))
+        if self.fmt == "bin":
+            rows.tofile(self.__f)
+        else:
+            self.__f.writelines(",".join(map(lambda s: float_fmt.format(s),
+                                             row)) + "\n"
+                                for row in rows)
+        self.rows += len(rows)
+
+    def close(self):
+        if self.__f.closed:
+            return
+        if self.fmt == "bin":
+            self.__header[1] = self.rows
+            self.__f.seek(0)
+            numpy.array(self.__header, dtype=dtype).tofile(self.__f)
+        self.__f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_params(f_name, params, h0, volume, theta_t, theta_b,
+                 gamma=numpy.nan):
+    """Write the parameter table (rows, cols) in binary format
+    """
+    params = numpy.atleast_2d(params)
+    with ParamsWriter(f_name, cols=params.shape[1], fmt="bin",
+                      h0=h0, volume=volume, theta_t=theta_t,
+                      theta_b=theta_b, gamma=gamma) as writer:
+        writer.write(params)
+
+
+def read_params(f_name, mmap=True):
+    """Read a binary parameter file
+    Returns the header as dict and the (rows, cols) table, which is
+    a read-only memory map if mmap is True
+    """
+    if mmap:
+        raw = numpy.memmap(f_name, dtype=dtype, mode="r")
+    else:
+        raw = numpy.fromfile(f_name, dtype=dtype)
+    if len(raw) < header_size or raw[0] != version:
+        raise ValueError("{} is not a parameter file of "
+                         "version {}".format(f_name, version))
+    header = dict(zip(header_fields, map(float, raw[:header_size])))
+    rows, cols = int(header["rows"]), int(header["cols"])
+    if len(raw) != header_size + rows * cols:
+        raise ValueError("{} is truncated".format(f_name))
+    return header, raw[header_size:].reshape(rows, cols)
+
+
+def write_params_csv(f_name, params, fmt="{:.3f}"):
+    """Write the parameter table as text
+    """
+    params = numpy.atleast_2d(params)
+    with ParamsWriter(f_name, cols=params.shape[1], fmt="csv") as writer:
+        writer.write(params, float_fmt=fmt)
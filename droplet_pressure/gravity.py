@@ -0,0 +1,483 @@
+from __future__ import print_function
+import numpy
+from numpy import sin, cos, pi
+from droplet_pressure.droplet import gamma_0, g
+from droplet_pressure.droplet import initial_height, solve_r1
+from droplet_pressure.report import get_logger
+
+"""Gravity-corrected droplet profiles
+The right meridian (r, z) between the plates solves the Young-Laplace
+equation with hydrostatic pressure. With the tangent angle psi of the
+meridian as independent variable, pi - theta_b at the bottom plate,
+pi / 2 at the equator and theta_t at the top plate,
+    K = (p_e - rho * g * z) / gamma - sin(psi) / r
+    dr / dpsi = cos(psi) / K
+    dz / dpsi = sin(psi) / K
+    dV / dpsi = pi * r ** 2 * sin(psi) / K
+where z is measured from the equator and p_e is the pressure there.
+The profile is shot from the equator (radius r1) towards both plates.
+The unknowns (p_e, r1) of many heights are solved at once, every
+height being a column of the RK4 arrays, by a 2D Newton on the plate
+distance h and the volume v0 with complex-step Jacobians.
+The reference state h0 is the height where the droplet pushes no net
+force on the top plate, the truncated sphere without gravity,
+    p_t * a_t = 2 * gamma * sin(theta_t)
+with the pressure p_t and the contact radius a_t at the top plate.
+"""
+
+log = get_logger("gravity")
+
+rho_si = 13.6e3                 # mercury density in kg / m^3
+
+
+def rk4_psi(psi, r0, P, bond, full=False):
+    """Integrate the dimensionless meridian from the equator
+    psi: (nodes, ...) angles, psi[0] = pi / 2, broadcastable to r0
+    r0, P, bond: equator radius, P = p_e * L / gamma and
+                 bond = rho * g * L ** 2 / gamma, lengths scaled by L
+    Returns r, z, V at the last node (all nodes if full)
+    Points where the meridian curvature K changes sign become nan.
+    """
+    def rhs(t, r, z):
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            k = P - bond * z
+            az = sin(t) / r
+            # Point contact (theta = pi, r = 0): both curvatures agree
+            az = numpy.where(r == 0, k / 2, az)
+            ds = 1 / (k - az)
+        ds = numpy.where(ds.real > 0, ds, numpy.nan)
+        return cos(t) * ds, sin(t) * ds, pi * r ** 2 * sin(t) * ds
+
+    r = r0 + 0 * P + 0 * psi[0]
+    z = 0 * r
+    V = 0 * r
+    nodes = [(r, z, V)]
+    for t, dt in zip(psi[:-1], numpy.diff(psi, axis=0)):
+        k1 = rhs(t, r, z)
+        k2 = rhs(t + dt / 2, r + dt / 2 * k1[0], z + dt / 2 * k1[1])
+        k3 = rhs(t + dt / 2, r + dt / 2 * k2[0], z + dt / 2 * k2[1])
+        k4 = rhs(t + dt, r + dt * k3[0], z + dt * k3[1])
+        r, z, V = (y + dt / 6 * (a + 2 * b + 2 * c + d)
+                   for y, a, b, c, d in zip((r, z, V), k1, k2, k3, k4))
+        if full:
+            nodes.append((r, z, V))
+    if full:
+        return tuple(numpy.stack(y) for y in zip(*nodes))
+    return r, z, V
+
+
+class GravityDroplet(object):
+    """Parameters
+    initial_volume: V_0
+    theta_t, theta_b: contact angles in radians, within [pi / 2, pi]
+    gamma: surface tension
+    rho: liquid density in kg / m^3, default to mercury
+    gravity: gravitational acceleration
+    steps: RK4 steps from the equator to each plate
+    tol, maxiter: Newton on the shooting parameters (p_e, r1)
+    The meridian must be convex (psi monotone), which holds under
+    compression, heights without a convex profile give nan. h0 is the
+    height of zero force on the top plate, solved on first use, lengths
+    are scaled by h_sphere, the height of the truncated sphere. With a
+    point contact on the top plate (theta_t = pi) h0 is the apex
+    height of the sessile droplet.
+    Same interface as Droplet for sweeps: h0, p0, solve_heights,
+    get_profiles, h, r1, r2, get_curve_pressure, get_delta_stress.
+    r1, r2 and delta_b are the radius, the meridian radius of curvature
+    and the height of the equator. Solutions are kept to warm start the
+    next solve.
+    """
+
+    def __init__(self,
+                 initial_volume,
+                 theta_t=pi,
+                 theta_b=pi,
+                 gamma=gamma_0,
+                 rho=rho_si,
+                 gravity=g,
+                 steps=128,
+                 tol=1e-10,
+                 maxiter=30):
+        if not (pi / 2 <= theta_t <= pi and pi / 2 <= theta_b <= pi) \
+                or theta_t + theta_b <= pi:
+            raise ValueError("Contact angles must be within [pi / 2, pi]")
+        self.v0 = initial_volume
+        self.theta_t = theta_t
+        self.theta_b = theta_b
+        self.gamma = gamma
+        self.rho = rho
+        self.gravity = gravity
+        self.tol = tol
+        self.maxiter = maxiter
+        self.h_sphere = initial_height(initial_volume, theta_t, theta_b)
+        self.bond = rho * gravity * self.h_sphere ** 2 / gamma
+        # psi nodes towards the bottom (column 0) and the top plate
+        self.psi = numpy.linspace(pi / 2, [pi - theta_b, theta_t],
+                                  steps + 1)
+        self.iterations = 0
+        self.failures = 0
+        self.__warm = None
+        self.__ref = None
+        self.__h0 = None
+        self.__h = None
+        self.__state = None
+        self.__p0 = None
+
+    def guess(self, h):
+        """Initial (P, r1 / h_sphere) from the last solution, or from the
+        near-spherical model for the heights outside of it
+        """
+        h = numpy.asarray(h, dtype=float)
+        r1 = solve_r1(h, self.v0, self.theta_t, self.theta_b)
+        r2 = -h / (cos(self.theta_t) + cos(self.theta_b))
+        P = (1 / r1 + 1 / r2) * self.h_sphere
+        r0 = r1 / self.h_sphere
+        if self.__warm is not None:
+            hs, Ps, rs = self.__warm
+            inside = (h >= hs[0]) & (h <= hs[-1])
+            P = numpy.where(inside, numpy.interp(h, hs, Ps), P)
+            r0 = numpy.where(inside, numpy.interp(h, hs, rs), r0)
+        return P, r0
+
+    def integrate(self, P, r0, bond=None, full=False):
+        """Meridians towards both plates for the shooting parameters
+        Returns r, z, V with a leading axis (bottom, top), after the
+        axis of the nodes if full
+        """
+        bond = self.bond if bond is None else bond
+        shape = self.psi.shape + (1,) * numpy.ndim(P)
+        return rk4_psi(self.psi.reshape(shape), r0, P, bond, full=full)
+
+    def shoot(self, h, x0=None):
+        """Solve the shooting parameters for an array of heights
+        x0: optional (P, r1 / h_sphere) initial guess, see guess
+        Returns P = p_e * h_sphere / gamma and r1 / h_sphere.
+        Heights not converging from the guess are continued from
+        zero gravity, those still not converging are nan, counted in
+        failures and reported as a warning.
+        """
+        P, r0 = self.__shoot(h, x0)
+        self.failures = int(numpy.sum(numpy.isnan(P)))
+        if self.failures:
+            log.warning("No convex profile found for %d of %d heights, "
+                        "the plates may be farther apart than the "
+                        "sagging droplet", self.failures, numpy.size(P))
+        return P, r0
+
+    def __shoot(self, h, x0=None):
+        h = numpy.asarray(h, dtype=float)
+        P, r0 = self.guess(h) if x0 is None else x0
+        P = numpy.array(numpy.broadcast_to(P, h.shape),
+                        dtype=float).ravel()
+        r0 = numpy.array(numpy.broadcast_to(r0, h.shape),
+                         dtype=float).ravel()
+        target = numpy.stack((h.ravel() / self.h_sphere,
+                              numpy.full(h.size,
+                                         self.v0 / self.h_sphere ** 3)))
+        P, r0, ok = self.__newton(P, r0, target, self.bond)
+        if not numpy.all(ok) and self.__warm is not None:
+            # Beyond the solved heights from the nearest of them
+            hs, Ps, rs = self.__warm
+            i = numpy.flatnonzero(~ok)
+            h_f = h.ravel()[i]
+            P_w, r0_w, ok_w = self.__newton(numpy.interp(h_f, hs, Ps),
+                                            numpy.interp(h_f, hs, rs),
+                                            target[:, i], self.bond)
+            P[i], r0[i], ok[i] = P_w, r0_w, ok_w
+        if not numpy.all(ok):
+            P_c, r0_c = self.guess(h.ravel()[~ok])
+            P_c, r0_c, ok_c = self.__continuation(P_c, r0_c,
+                                                  target[:, ~ok],
+                                                  min_step=1e-2)
+            P[~ok] = numpy.where(ok_c, P_c, numpy.nan)
+            r0[~ok] = numpy.where(ok_c, r0_c, numpy.nan)
+        solved = ~numpy.isnan(P)
+        if numpy.any(solved):
+            self.__set_warm(h.ravel()[solved], P[solved], r0[solved])
+        return P.reshape(h.shape), r0.reshape(h.shape)
+
+    def __set_warm(self, h, P, r0):
+        if self.__ref is not None:
+            # The reference state is kept
+            h, P, r0 = (numpy.append(x, y) for x, y in zip((h, P, r0),
+                                                            self.__ref))
+        order = numpy.argsort(h)
+        self.__warm = (h[order], P[order], r0[order])
+
+    def __continuation(self, P, r0, target, force=False, min_step=1e-3):
+        """Newton continued from zero gravity, the Bond number of
+        every column grows by adaptive steps, halved on failure down
+        to min_step * bond
+        Returns P, r0 and the mask of the columns reaching self.bond
+        """
+        bond = numpy.zeros_like(P)
+        step = numpy.full_like(P, self.bond / 4)
+        P, r0, ok = self.__newton(P, r0, target, bond, force=force)
+        # Columns failing at zero gravity are dropped
+        step[~ok] = 0
+        while True:
+            todo = (bond < self.bond) & (step > min_step * self.bond)
+            if not numpy.any(todo):
+                break
+            trial = numpy.minimum(bond[todo] + step[todo], self.bond)
+            P_t, r0_t, ok = self.__newton(P[todo], r0[todo],
+                                          target[:, todo], trial,
+                                          force=force)
+            i = numpy.flatnonzero(todo)
+            P[i[ok]], r0[i[ok]], bond[i[ok]] = P_t[ok], r0_t[ok], trial[ok]
+            step[i] *= numpy.where(ok, 2, 0.5)
+        return P, r0, bond >= self.bond
+
+    def __reference(self):
+        """Zero force on the top plate, where the pressure on the
+        contact area balances the surface tension, solved for the
+        shooting parameters. Sets h0, p0 and the warm start.
+        """
+        if self.theta_t == pi:
+            P, r0, z_t = self.__apex()
+        else:
+            P, r0 = self.__zero_force()
+            z_t = None
+        _, z, _ = self.integrate(P, r0)
+        if z_t is None:
+            z_t = float(z[1, 0])
+        L = self.h_sphere
+        self.__h0 = (z_t - float(z[0, 0])) * L
+        p = float(P[0]) * self.gamma / L
+        self.__p0 = (p, p - self.rho * self.gravity * float(z[0, 0]) * L)
+        self.__ref = (self.__h0, float(P[0]), float(r0[0]))
+        self.__set_warm(numpy.empty(0), P[:0], r0[:0])
+
+    def __zero_force(self):
+        P, r0 = (numpy.atleast_1d(x) for x in self.guess(self.h_sphere))
+        target = numpy.array([[0.0], [self.v0 / self.h_sphere ** 3]])
+        P_n, r0_n, ok = self.__newton(P, r0, target, self.bond, force=True)
+        if ok[0]:
+            return P_n, r0_n
+        P, r0, ok = self.__continuation(P, r0, target, force=True)
+        if not ok[0]:
+            raise RuntimeError("No zero-force state found")
+        return P, r0
+
+    def __apex(self):
+        """Point contact on the top plate: the sessile droplet with
+        its apex on the plate, where a_t = 0 and the force vanishes.
+        The top part is shot from the apex (r = 0, psi = pi) down to
+        the equator, the apex pressure is found by regula falsi on
+        the volume. Returns the shooting parameters at the equator
+        and the height of the apex above the equator.
+        """
+        psi = numpy.linspace(pi, pi / 2, len(self.psi))
+        v = self.v0 / self.h_sphere ** 3
+
+        def excess(P_a):
+            r, z, V = rk4_psi(psi, 0.0, P_a, self.bond)
+            # Equator pressure, z is measured from the apex
+            P = numpy.atleast_1d(P_a - self.bond * z)
+            r0 = numpy.atleast_1d(r)
+            _, _, V_b = self.integrate(P, r0)
+            # Both parts are integrated downwards
+            return float((-V - V_b[0, 0]) / v - 1), P, r0, -float(z)
+
+        # The volume decreases with the apex curvature
+        lo, hi = (float(x) for x in self.guess(self.h_sphere))
+        lo = hi = lo
+        f_lo = f_hi = excess(lo)[0]
+        for _ in range(60):
+            if f_lo > 0 and f_hi < 0:
+                break
+            if numpy.isnan(f_lo + f_hi):
+                # Puddles beyond the resolution of the nodes
+                break
+            if not f_lo > 0:
+                lo, f_lo = lo / 2, excess(lo / 2)[0]
+            if not f_hi < 0:
+                hi, f_hi = hi * 2, excess(hi * 2)[0]
+        else:
+            raise RuntimeError("No sessile state found")
+        # Illinois variant of the regula falsi
+        side = 0
+        for _ in range(100):
+            P_a = (lo * f_hi - hi * f_lo) / (f_hi - f_lo)
+            f, P, r0, z_t = excess(P_a)
+            if numpy.isnan(f):
+                break
+            if abs(f) <= self.tol or hi - lo <= self.tol * hi:
+                return P, r0, z_t
+            if f > 0:
+                lo, f_lo = P_a, f
+                if side == 1:
+                    f_hi /= 2
+                side = 1
+            else:
+                hi, f_hi = P_a, f
+                if side == -1:
+                    f_lo /= 2
+                side = -1
+        raise RuntimeError("No sessile state found")
+
+    def __newton(self, P, r0, target, bond, force=False):
+        """Damped 2D Newton, returns P, r0 and the converged mask
+        target: (2, n) plate distance and volume, the plate distance
+                is replaced by zero force on the top plate if force
+        """
+        eps = 1e-30
+        # Complex steps in P (row 0) and r0 (row 1) at once
+        step_P = numpy.array([[1j * eps], [0]])
+        step_r = numpy.array([[0], [1j * eps]])
+
+        def residual(P, r0):
+            P = P + step_P
+            r, z, V = self.integrate(P, r0 + step_r, bond)
+            if force:
+                # Force on the top plate per contact line length
+                F_h = (P - bond * z[1]) * r[1] / 2 - sin(self.theta_t)
+            else:
+                F_h = (z[1] - z[0]) / target[0] - 1
+            # V of the bottom part is negative
+            F = numpy.stack((F_h, (V[1] - V[0]) / target[1] - 1))
+            return F[:, 0].real, F.imag / eps
+        F, J = residual(P, r0)
+        norm = numpy.max(numpy.abs(F), axis=0)
+        for self.iterations in range(1, self.maxiter + 1):
+            # Columns starting without a convex profile are given up
+            todo = ~(norm <= self.tol) & numpy.isfinite(norm)
+            if not numpy.any(todo):
+                break
+            # 2 x 2 Newton step per height
+            (a, b), (c, d) = J
+            det = a * d - b * c
+            dP = (d * F[0] - b * F[1]) / det
+            dr = (a * F[1] - c * F[0]) / det
+            lam = numpy.ones_like(P)
+            for _ in range(10):
+                P_new = numpy.where(todo, P - lam * dP, P)
+                r_new = numpy.where(todo, r0 - lam * dr, r0)
+                F_new, J_new = residual(P_new, r_new)
+                norm_new = numpy.max(numpy.abs(F_new), axis=0)
+                # Halve the step where the residual did not decrease
+                worse = todo & ~(norm_new < norm)
+                if not numpy.any(worse):
+                    break
+                lam = numpy.where(worse, lam / 2, lam)
+            # Heights still not improving keep their last iterate
+            P = numpy.where(worse, P, P_new)
+            r0 = numpy.where(worse, r0, r_new)
+            F = numpy.where(worse, F, F_new)
+            J = numpy.where(worse, J, J_new)
+            norm = numpy.where(worse, norm, norm_new)
+            if numpy.all(worse[todo]):
+                break
+        return P, r0, norm <= self.tol
+
+    def __shape(self, h):
+        """Solved meridians (see integrate) and the dimensional
+        equator radius, equator height and pressure
+        """
+        P, r0 = self.shoot(h)
+        r, z, V = self.integrate(P, r0, full=True)
+        L = self.h_sphere
+        return (r, z, V), r0 * L, -z[-1, 0] * L, P * self.gamma / L
+
+    def solve_heights(self, h, gravity=False):
+        """Batched solve over an array of heights
+        Returns arrays of r1, r2, delta_t, delta_b and the pressure,
+        the Laplace pressure at the equator, or the pressure on the
+        bottom plate if gravity
+        """
+        h = numpy.asarray(h, dtype=float)
+        _, r1, delta_b, p = self.__shape(h)
+        # Meridian curvature at the equator
+        r2 = 1 / (p / self.gamma - 1 / r1)
+        if gravity:
+            p = p + self.rho * self.gravity * delta_b
+        return r1, r2, h - delta_b, delta_b, p
+
+    def get_profiles(self, h, resolution=64):
+        """Right meridian for an array of heights
+        Returns vertices (..., resolution, 2) from the bottom to the
+        top contact point, equally spaced in psi, the centers (..., 2)
+        of the osculating circles at the equator and their radii r2
+        """
+        h = numpy.asarray(h, dtype=float)
+        (r, z, _), r1, delta_b, p = self.__shape(h)
+        L = self.h_sphere
+        r2 = 1 / (p / self.gamma - 1 / r1)
+        # Nodes from the bottom to the top plate
+        psi = numpy.concatenate((self.psi[::-1, 0], self.psi[1:, 1]))
+        r, z = (numpy.concatenate((y[::-1, 0], y[1:, 1])) for y in (r, z))
+        t = numpy.linspace(psi[0], psi[-1], resolution)
+        i = numpy.clip(numpy.searchsorted(psi, t) - 1, 0, len(psi) - 2)
+        w = (t - psi[i]) / (psi[i + 1] - psi[i])
+        w = w.reshape((-1,) + (1,) * h.ndim)
+        verts = numpy.stack([(y[i] * (1 - w) + y[i + 1] * w) * L
+                             for y in (r, z)], axis=-1)
+        verts = numpy.moveaxis(verts, 0, -2)
+        verts[..., 1] += delta_b[..., None]
+        centers = numpy.stack((r1 - r2, delta_b), axis=-1)
+        return verts, centers, r2
+
+    @property
+    def h0(self):
+        if self.__h0 is None:
+            self.__reference()
+        return self.__h0
+
+    @property
+    def h(self):
+        if self.__h is None:
+            return self.h0
+        return self.__h
+
+    @h.setter
+    def h(self, h):
+        self.__h = h
+        self.__state = None
+
+    def __solve_state(self):
+        if self.__state is None:
+            self.__state = tuple(float(x) for x in
+                                 self.solve_heights(self.h))
+        return self.__state
+
+    @property
+    def r1(self):
+        return self.__solve_state()[0]
+
+    @property
+    def r2(self):
+        return self.__solve_state()[1]
+
+    def get_separate_height(self):
+        return self.__solve_state()[2:4]
+
+    def get_curve_pressure(self, gravity=False):
+        """Laplace pressure at the equator, the pressure on the bottom
+        plate if gravity
+        """
+        _, _, _, delta_b, p = self.__solve_state()
+        if gravity:
+            return p + self.rho * self.gravity * delta_b
+        return p
+
+    @property
+    def p0(self):
+        """Laplace pressure at the equator of the reference state
+        """
+        if self.__p0 is None:
+            self.__reference()
+        return self.__p0[0]
+
+    @property
+    def p0_gravity(self):
+        """Pressure on the bottom plate of the reference state
+        """
+        if self.__p0 is None:
+            self.__reference()
+        return self.__p0[1]
+
+    def get_delta_stress(self, gravity=False):
+        p = self.get_curve_pressure(gravity=gravity)
+        if gravity:
+            return p - self.p0_gravity
+        return p - self.p0
@@ -0,0 +1,206 @@
+from __future__ import print_function
+import numpy
+from numpy import sin, pi
+from droplet_pressure.droplet import VolumeKernel, angle_terms
+
+"""Contact-angle hysteresis and pinning
+The contact line on each plate stays pinned while its contact angle
+lies between the receding and the advancing angle. Beyond them it
+slides with the angle held at the threshold. The meridian circle is
+set by the two angles and the volume v0, the angles of a step solve
+    theta = clip(theta + (a - a_prev) / h0, receding, advancing)
+per plate, a being the contact radius and a_prev the one of the
+previous step: a pinned line keeps its radius, an advancing one moves
+outwards at the advancing angle, a receding one inwards at the
+receding angle. Starting from the angles of the previous step, a
+line sliding on converges without a Jacobian.
+The state is carried forward step by step, which stays a Python loop
+over the steps: about 0.6 ms per step for one path, 1.2 ms per step
+for a batch of 64 paths. Repeated cycles settle on a closed loop,
+given the period run stops solving once a cycle starts from the same
+state as the previous one, so that 1000 cycles cost about two.
+"""
+
+# Regimes of a contact line
+pinned, advancing, receding = 0, 1, -1
+
+fields = ("strain", "h", "theta_t", "theta_b", "a_t", "a_b",
+          "mode_t", "mode_b", "r1", "r2", "pressure", "stress")
+
+
+def circle_geometry(theta_t, theta_b, h, v0, terms=None):
+    """Meridian circle through both plates at the contact angles
+    enclosing the volume v0, angles within (pi / 2, pi]
+    terms: angle_terms of theta_t and theta_b, computed if not given
+    Returns r1, r2 and the contact radii a_t, a_b
+    """
+    if terms is None:
+        terms = (angle_terms(theta_t), angle_terms(theta_b))
+    kernel = VolumeKernel(theta_t, theta_b, terms)
+    A, B, C = kernel.coefficients(h, v0)
+    sqrt_D = numpy.sqrt(B ** 2 - 4 * A * C)
+    # Larger root as solve_r1, without cancellation
+    r1 = numpy.where(numpy.real(B) >= 0,
+                     2 * C / (-B - sqrt_D),
+                     (-B + sqrt_D) / (2 * A))
+    r2 = -h / kernel.base
+    c = r1 - r2
+    return r1, r2, c + r2 * terms[0][1], c + r2 * terms[1][1]
+
+
+class Pinning(object):
+    """Parameters
+    drop: the Droplet, its angles are the initial equilibrium
+    advancing, receding: threshold angles in radians, scalars or
+                         (top, bottom) pairs
+    tol, maxiter: Newton on the contact angles of a step
+    substeps: number of times a step may be halved when the Newton
+              does not converge
+    """
+
+    def __init__(self, drop, advancing, receding, tol=1e-12, maxiter=50,
+                 substeps=8):
+        self.drop = drop
+        self.advancing = numpy.broadcast_to(numpy.asarray(advancing,
+                                                          dtype=float), 2)
+        self.receding = numpy.broadcast_to(numpy.asarray(receding,
+                                                         dtype=float), 2)
+        if numpy.any(self.receding >= self.advancing) \
+                or numpy.any(self.receding <= pi / 2) \
+                or numpy.any(self.advancing > pi):
+            raise ValueError("Expected pi / 2 < receding < advancing <= pi")
+        theta = numpy.array([drop.theta_t, drop.theta_b])
+        if numpy.any(theta < self.receding) \
+                or numpy.any(theta > self.advancing):
+            raise ValueError("Initial angles outside of the "
+                             "hysteresis range")
+        self.tol = tol
+        self.maxiter = maxiter
+        self.substeps = substeps
+
+    def solve(self, theta, h, contact):
+        """Semi-smooth Newton on the angles (2, paths) of one step
+        theta: angles of the previous step, the initial guess
+        contact: (2, paths) contact radii of the previous step
+        Returns the angles, the regimes, the converged mask and the
+        circle (r1, r2, a_t, a_b) of the angles
+        """
+        drop = self.drop
+        adv = self.advancing[:, None]
+        rec = self.receding[:, None]
+        eps = 1e-30
+        # Pair j has the complex step in angle j
+        stepped = numpy.eye(2, dtype=bool)[:, :, None]
+
+        def residual(theta, jacobian=True):
+            if jacobian:
+                # One complex step per plate, the real parts are the
+                # terms of the unstepped angles
+                t = numpy.where(stepped, theta + 1j * eps, theta)
+                terms = [numpy.where(stepped, x, x.real)
+                         for x in angle_terms(theta + 1j * eps)]
+            else:
+                t = theta[None]
+                terms = [x[None] for x in angle_terms(theta)]
+            circle = circle_geometry(t[:, 0], t[:, 1], h, drop.v0,
+                                     ([x[:, 0] for x in terms],
+                                      [x[:, 1] for x in terms]))
+            u = t + (numpy.stack(circle[2:], axis=1) - contact) / drop.h0
+            # clip on the real part, keeps the complex steps
+            R = t - numpy.where(u.real > adv, adv,
+                                numpy.where(u.real < rec, rec, u))
+            # J[i, j]: residual i with a step in angle j
+            J = R.imag.transpose(1, 0, 2) / eps if jacobian else None
+            return R[0].real, J, u[0].real, [x[0].real for x in circle]
+
+        # A line sliding on needs no Jacobian
+        F, J, u, circle = residual(theta, jacobian=False)
+        norm = numpy.max(numpy.abs(F), axis=0)
+        for _ in range(self.maxiter):
+            todo = ~(norm <= self.tol)
+            if not numpy.any(todo):
+                break
+            if J is None:
+                F, J, u, circle = residual(theta)
+            (a, b), (c, d) = J
+            det = a * d - b * c
+            step = numpy.stack((d * F[0] - b * F[1],
+                                a * F[1] - c * F[0])) / det
+            lam = 1.0
+            for _ in range(8):
+                # The angles stay within the thresholds
+                new = numpy.where(todo, numpy.clip(theta - lam * step,
+                                                   rec, adv), theta)
+                result = residual(new)
+                norm_new = numpy.max(numpy.abs(result[0]), axis=0)
+                if not numpy.any(todo & ~(norm_new < norm)):
+                    break
+                lam /= 2
+            theta, norm = new, norm_new
+            F, J, u, circle = result
+        mode = numpy.where(u > adv, advancing,
+                           numpy.where(u < rec, receding, pinned))
+        return theta, mode, norm <= self.tol, circle
+
+    def run(self, strain, period=None, rtol=1e-10):
+        """Track the contact lines along the strain paths
+        strain: (steps,) or (steps, paths), strain = 1 - h / h0
+        period: steps per cycle of a repeated strain history, see
+                Schedule.period. Once the angles and contact radii at
+                the start of a cycle match those of the previous cycle
+                within rtol, the solved cycle is tiled over the
+                remaining steps.
+        Returns a structured array (steps, paths) with the columns
+        in `fields`, mode_t and mode_b are pinned (0), advancing (1)
+        or receding (-1)
+        """
+        drop = self.drop
+        strain = numpy.asarray(strain, dtype=float)
+        shape = strain.shape
+        strain = strain.reshape(len(strain), -1)
+        h = drop.h0 * (1 - strain)
+        res = numpy.zeros(strain.shape, dtype=[(f, float) for f in fields])
+        # Free droplet at the initial angles
+        theta = numpy.zeros((2, h.shape[1]))
+        theta[0], theta[1] = drop.theta_t, drop.theta_b
+        mode = numpy.zeros(theta.shape)
+        circle = circle_geometry(theta[0], theta[1], h[0], drop.v0)
+        p0 = drop.p0
+        cycle = None
+        for k in range(len(h)):
+            if k > 0:
+                theta, mode, circle = self.__step(theta, contact,
+                                                  h[k - 1], h[k])
+            r1, r2, a_t, a_b = circle
+            contact = numpy.array([a_t, a_b])
+            p = drop.gamma * (1 / r1 + 1 / r2)
+            for f, col in zip(fields, (strain[k], h[k], theta[0], theta[1],
+                                       a_t, a_b, mode[0], mode[1], r1, r2,
+                                       p, p - p0)):
+                res[f][k] = col
+            if period and k % period == 0:
+                state = numpy.concatenate((theta, contact))
+                if cycle is not None \
+                        and numpy.allclose(state, cycle, rtol=rtol, atol=0):
+                    # Same state and strains as one cycle before
+                    tile = k - period + numpy.arange(len(h) - k) % period
+                    if numpy.array_equal(strain[k:], strain[tile]):
+                        res[k:] = res[tile]
+                        break
+                cycle = state
+        return res.reshape(shape)
+
+    def __step(self, theta, contact, h_from, h_to, depth=0):
+        """Angles, regimes and circle at h_to, the step is halved
+        while the Newton does not converge
+        """
+        theta_new, mode, ok, circle = self.solve(theta, h_to, contact)
+        if numpy.all(ok):
+            return theta_new, mode, circle
+        if depth == self.substeps:
+            raise RuntimeError("Pinning solve did not converge")
+        h_mid = (h_from + h_to) / 2
+        theta, _, circle = self.__step(theta, contact, h_from, h_mid,
+                                       depth + 1)
+        return self.__step(theta, numpy.array(circle[2:]), h_mid, h_to,
+                           depth + 1)
@@ -0,0 +1,98 @@
+from __future__ import print_function
+import multiprocessing
+import numpy
+from droplet_pressure.droplet import gamma_0, initial_height
+from droplet_pressure.sweep import evaluate
+
+"""Process-pool executor for large parameter studies
+State points (volume, theta_t, theta_b, h) are split into chunks,
+solved in worker processes and streamed back in input order.
+"""
+
+
+def solve_chunk(chunk):
+    """Solve one chunk of state points (runs in the workers)
+    chunk: tuple of 1D arrays (volume, theta_t, theta_b, gamma, h)
+    """
+    v0, t_t, t_b, gm, h = chunk
+    h0 = initial_height(v0, t_t, t_b)
+    return evaluate(v0, t_t, t_b, gm, h0, h, 1 - h / h0)
+
+
+class SweepExecutor(object):
+    """Parameters
+    chunk_size: number of state points per task
+    workers: number of worker processes, default to all cores,
+             1 solves in the calling process
+    progress: optional callback(points_done, points_total)
+    Progress counters: chunks_done, chunks_total,
+                       points_done, points_total
+    """
+
+    def __init__(self, chunk_size=100000, workers=None, progress=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = int(chunk_size)
+        self.workers = workers or multiprocessing.cpu_count()
+        self.progress = progress
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.points_done = 0
+        self.points_total = 0
+
+    def chunks(self, volume, theta_t, theta_b, h, gamma=gamma_0):
+        """Broadcast the state arrays and split them into chunks
+        """
+        states = [numpy.ravel(x) for x in
+                  numpy.broadcast_arrays(*[numpy.asarray(x, dtype=float)
+                                           for x in (volume, theta_t,
+                                                     theta_b, gamma, h)])]
+        n = len(states[0])
+        for start in range(0, n, self.chunk_size):
+            yield tuple(x[start: start + self.chunk_size] for x in states)
+
+    def imap(self, volume, theta_t, theta_b, h, gamma=gamma_0):
+        """Yield the solved chunks (structured arrays) in input order
+        """
+        n = numpy.broadcast(volume, theta_t, theta_b, gamma, h).size
+        return self.imap_chunks(self.chunks(volume, theta_t, theta_b, h,
+                                            gamma),
+                                n, -(-n // self.chunk_size))
+
+    def imap_chunks(self, chunks, points_total, chunks_total):
+        """Yield the solved chunks of an iterable of solve_chunk
+        tuples in input order, for callers splitting the points
+        themselves
+        """
+        self.points_total = points_total
+        self.chunks_total = chunks_total
+        self.chunks_done = 0
+        self.points_done = 0
+        if self.workers == 1:
+            for res in map(solve_chunk, chunks):
+                self.__count(res)
+                yield res
+            return
+        pool = multiprocessing.Pool(self.workers)
+        try:
+            # imap keeps the input order of the chunks
+            for res in pool.imap(solve_chunk, chunks):
+                self.__count(res)
+                yield res
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def run(self, volume, theta_t, theta_b, h, gamma=gamma_0):
+        """Solve all state points, returns one flat structured array
+        """
+        res = list(self.imap(volume, theta_t, theta_b, h, gamma))
+        if len(res) == 0:
+            return evaluate(*([numpy.empty(0)] * 7))
+        return numpy.concatenate(res)
+
+    def __count(self, res):
+        self.chunks_done += 1
+        self.points_done += len(res)
+        if self.progress is not None:
+            self.progress(self.points_done, self.points_total)
@@ -0,0 +1,131 @@
+from __future__ import print_function
+import logging
+import sys
+from time import perf_counter
+import numpy
+
+"""Logging and reporting
+All messages go to the "droplet_pressure" logger, which is silent
+unless set_verbosity is called. Per-frame records are buffered and
+written in one go, progress is throttled by wall time.
+"""
+
+logger = logging.getLogger("droplet_pressure")
+logger.addHandler(logging.NullHandler())
+
+# verbosity -> logging level
+levels = {0: logging.WARNING, 1: logging.INFO, 2: logging.DEBUG}
+
+
+def get_logger(name=None):
+    """Child logger of the package logger, e.g. for the examples
+    """
+    if name is None:
+        return logger
+    return logger.getChild(name)
+
+
+def set_verbosity(verbosity=1, stream=None):
+    """Show the package messages
+    verbosity: 0 warnings only, 1 progress, 2 debug output
+    stream: default to sys.stderr
+    """
+    for handler in list(logger.handlers):
+        if getattr(handler, "_verbosity", False):
+            logger.removeHandler(handler)
+    level = levels[min(max(int(verbosity), 0), 2)]
+    logger.setLevel(level)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter("%(name)s: %(message)s"))
+    handler._verbosity = True
+    logger.addHandler(handler)
+    return logger
+
+
+class FrameRecorder(object):
+    """Buffered per-frame records
+    Parameters
+    fields: names of the recorded values
+    f_name: csv file written by flush, nothing is written if None
+    Records are kept in memory and written in bulk by flush (or when
+    leaving the with block).
+    """
+
+    def __init__(self, fields, f_name=None):
+        self.fields = tuple(fields)
+        self.f_name = f_name
+        self.rows = []
+
+    def record(self, *values):
+        """Append one frame, values in the order of fields
+        """
+        self.rows.append(values)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def as_array(self):
+        return numpy.array(self.rows, dtype=float).reshape(
+            -1, len(self.fields))
+
+    def flush(self):
+        """Write all records to f_name at once
+        """
+        if self.f_name is None:
+            return
+        numpy.savetxt(self.f_name, self.as_array(), delimiter=",",
+                      header=",".join(self.fields))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        return False
+
+
+class Progress(object):
+    """Progress messages throttled by wall time
+    Parameters
+    total: number of items, may be None
+    interval: minimal seconds between two messages
+    name: label of the messages
+    log: logger used, default to the package logger
+    Usable as the progress callback of SweepExecutor.
+    """
+
+    def __init__(self, total=None, interval=1.0, name="progress",
+                 log=None):
+        self.total = total
+        self.interval = interval
+        self.name = name
+        self.log = log or logger
+        self.done = 0
+        self.messages = 0
+        self.__last = None
+
+    def __call__(self, done, total=None):
+        self.update(done, total)
+
+    def update(self, done, total=None):
+        """Set the number of finished items
+        A message is emitted at most every interval seconds
+        and when the total is reached
+        """
+        self.done = done
+        if total is not None:
+            self.total = total
+        if not self.log.isEnabledFor(logging.INFO):
+            return
+        now = perf_counter()
+        finished = self.total is not None and done >= self.total
+        if self.__last is not None and not finished \
+                and now - self.__last < self.interval:
+            return
+        self.__last = now
+        self.messages += 1
+        if self.total:
+            self.log.info("%s: %d / %d (%.0f%%)", self.name, done,
+                          self.total, 100.0 * done / self.total)
+        else:
+            self.log.info("%s: %d", self.name, done)
@@ -0,0 +1,111 @@
+from __future__ import print_function
+import numpy
+from droplet_pressure.droplet import pi
+from droplet_pressure.sweep import evaluate
+
+"""Loading schedules
+Piecewise strain histories (ramps, holds, sine waves and repeated
+cycles) evaluated in one batched pass. Repeated states are solved once.
+"""
+
+
+class Schedule(object):
+    """Parameters
+    start: strain of the first step
+    Segments are appended with ramp, hold and sine, repeat tiles the
+    schedule built so far. Each call returns the schedule, e.g.
+    Schedule().ramp(0.2, 10).hold(5).ramp(0, 10).repeat(1000)
+    Every step is one sample of the strain history.
+    period: steps per cycle after repeat, None otherwise
+    """
+
+    def __init__(self, start=0.0):
+        self.start = float(start)
+        self.period = None
+        self.__segments = []
+
+    def __len__(self):
+        return 1 + sum(len(seg) for seg in self.__segments)
+
+    @property
+    def current(self):
+        """Strain at the end of the schedule
+        """
+        for seg in reversed(self.__segments):
+            if len(seg):
+                return float(seg[-1])
+        return self.start
+
+    @property
+    def strains(self):
+        """Strain of every step, starting with `start`
+        """
+        return numpy.concatenate([[self.start]] + self.__segments)
+
+    def ramp(self, to, steps):
+        """Linear ramp from the current strain to `to` in `steps` steps
+        """
+        self.__append(numpy.linspace(self.current, to, steps + 1)[1:])
+        return self
+
+    def hold(self, steps):
+        """Keep the current strain for `steps` steps
+        """
+        self.__append(numpy.full(steps, self.current))
+        return self
+
+    def sine(self, amplitude, steps, cycles=1):
+        """Sine wave around the current strain
+        steps: steps per period, cycles: number of periods
+        Every period ends back at the current strain.
+        """
+        phase = numpy.arange(1, steps + 1) / float(steps)
+        wave = self.current + amplitude * numpy.sin(2 * pi * phase)
+        wave[-1] = self.current
+        self.__append(numpy.tile(wave, cycles))
+        return self
+
+    def repeat(self, n):
+        """Repeat the segments built so far n times in total
+        The schedule should end at `start` for the cycles to connect.
+        The length of one cycle is kept in `period`, with it
+        Pinning.run(schedule.strains, period=schedule.period) stops
+        solving once a cycle repeats the state of the previous one and
+        tiles it over the rest, thousands of cycles cost about two.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        if self.__segments:
+            cycle = numpy.concatenate(self.__segments)
+            self.__segments = [numpy.tile(cycle, n)]
+            self.period = len(cycle)
+        return self
+
+    def unique(self, decimals=12):
+        """Distinct strains of the schedule and the inverse index
+        strains ~ unique[inverse]
+        decimals: strains are rounded first, so that the same state
+                  reached by different ramps is only kept once
+        """
+        return numpy.unique(numpy.round(self.strains, decimals),
+                            return_inverse=True)
+
+    def evaluate(self, drop, decimals=12):
+        """Evaluate the droplet along the schedule
+        Each distinct strain is solved once, the result is gathered
+        back to every step.
+        Returns a numpy structured array with the columns of
+        sweep.fields, one row per step
+        """
+        strain, inverse = self.unique(decimals)
+        if numpy.any(strain >= 1):
+            raise ValueError("Strain must be smaller than 1")
+        res = evaluate(drop.v0, drop.theta_t, drop.theta_b, drop.gamma,
+                       drop.h0, drop.h0 * (1 - strain), strain)
+        return res[inverse]
+
+    def __append(self, values):
+        if len(values):
+            self.__segments.append(numpy.asarray(values, dtype=float))
+            # Steps after the cycles are not periodic
+            self.period = None
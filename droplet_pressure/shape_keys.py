@@ -0,0 +1,45 @@
+from __future__ import print_function
+import numpy
+
+"""Bulk vertex transfer for the Blender importer
+Only the `foreach_get` / `foreach_set` protocol of Blender collections
+is used, so nothing here imports bpy.
+"""
+
+
+def _transfer(collection, attr, verts, width):
+    """Overwrite the leading len(verts) entries of collection.attr
+    Remaining entries keep their values
+    """
+    verts = numpy.asarray(verts, dtype=numpy.float32)
+    n = len(collection)
+    if len(verts) > n:
+        raise ValueError("{} vertices do not fit into {} "
+                         "entries".format(len(verts), n))
+    buf = numpy.empty(n * width, dtype=numpy.float32)
+    collection.foreach_get(attr, buf)
+    buf = buf.reshape(n, width)
+    buf[:len(verts), :verts.shape[1]] = verts
+    if verts.shape[1] < width:
+        # Homogeneous weight of spline points
+        buf[:len(verts), verts.shape[1]:] = 1
+    collection.foreach_set(attr, buf.ravel())
+
+
+def set_points(points, verts):
+    """Set spline points (co is x, y, z, w) from (n, 3) or (n, 4) verts
+    """
+    _transfer(points, "co", verts, 4)
+
+
+def add_shape_keys(obj, frames_verts, prefix="step-"):
+    """Add one absolute shape key per frame
+    frames_verts: (frames, n, 3), e.g. from gen_verts_batch
+    Returns the list of added keys
+    """
+    keys = []
+    for i, verts in enumerate(frames_verts):
+        key = obj.shape_key_add(name="{}{}".format(prefix, i))
+        _transfer(key.data, "co", verts, 3)
+        keys.append(key)
+    return keys
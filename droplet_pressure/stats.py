@@ -0,0 +1,116 @@
+from __future__ import print_function
+from contextlib import contextmanager
+from time import perf_counter
+
+"""Solver instrumentation
+The r1 solvers report every call to the active collectors and hooks.
+Nothing is timed or counted unless a collector or a hook is active,
+the disabled cost is one list check per solver call.
+"""
+
+counters = ("calls", "points", "evaluations", "failures", "seconds")
+
+# Active SolverStats and callbacks, see collect and add_hook
+_collectors = []
+_hooks = []
+
+
+class SolverStats(object):
+    """Per-solver counters
+    calls: solver calls, points: heights solved,
+    evaluations: volume residual evaluations,
+    failures: points not converged or not finite,
+    seconds: wall time spent in the solver
+    """
+
+    def __init__(self):
+        self.solvers = dict()
+
+    def record(self, solver, points=1, evaluations=0, failures=0,
+               seconds=0.0):
+        entry = self.solvers.get(solver)
+        if entry is None:
+            entry = self.solvers[solver] = dict.fromkeys(counters, 0)
+        entry["calls"] += 1
+        entry["points"] += points
+        entry["evaluations"] += evaluations
+        entry["failures"] += failures
+        entry["seconds"] += seconds
+
+    def total(self, counter):
+        return sum(entry[counter] for entry in self.solvers.values())
+
+    def reset(self):
+        self.solvers.clear()
+
+    def report(self):
+        """Table of the counters, one line per solver
+        """
+        lines = ["{:<14s}".format("solver")
+                 + "".join("{:>13s}".format(c) for c in counters)]
+        for solver, entry in sorted(self.solvers.items()):
+            lines.append("{:<14s}".format(solver)
+                         + "".join("{:>13d}".format(entry[c])
+                                   for c in counters[:-1])
+                         + "{:>13.3e}".format(entry["seconds"]))
+        return "\n".join(lines)
+
+
+def add_hook(callback):
+    """Call callback(solver, info) after every solver call
+    info is a dict with the keys of `counters` but calls
+    """
+    _hooks.append(callback)
+
+
+def remove_hook(callback):
+    _hooks.remove(callback)
+
+
+@contextmanager
+def collect(stats):
+    """Record the solver calls of the block into stats
+    stats=None records nothing, an already active stats is not
+    added a second time
+    """
+    if stats is None or any(s is stats for s in _collectors):
+        yield stats
+        return
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+
+
+@contextmanager
+def profile(report=None):
+    """Collect the solver calls of the block into a new SolverStats
+    report: optional callable receiving the report at the end,
+            e.g. print
+    """
+    with collect(SolverStats()) as stats:
+        yield stats
+    if report is not None:
+        report(stats.report())
+
+
+def start():
+    """Start time of a solver call, None when nothing is recording
+    """
+    if _collectors or _hooks:
+        return perf_counter()
+    return None
+
+
+def stop(t0, solver, points=1, evaluations=0, failures=0):
+    """Report a solver call started at t0 = start()
+    """
+    if t0 is None:
+        return
+    seconds = perf_counter() - t0
+    for stats in _collectors:
+        stats.record(solver, points, evaluations, failures, seconds)
+    for callback in _hooks:
+        callback(solver, dict(points=points, evaluations=evaluations,
+                              failures=failures, seconds=seconds))
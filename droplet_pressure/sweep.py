@@ -0,0 +1,61 @@
+from __future__ import print_function
+import numpy
+from droplet_pressure.droplet import gamma_0, rho, g, pi, cos
+from droplet_pressure.droplet import initial_height, split_h, solve_r1
+
+"""Parameter-space sweeps
+Evaluate the droplet model over many (volume, theta_t, theta_b,
+gamma, strain) tuples at once with broadcasted array math.
+"""
+
+fields = ("volume", "theta_t", "theta_b", "gamma", "strain",
+          "h0", "h", "r1", "r2", "delta_t", "delta_b",
+          "pressure", "pressure_gravity",
+          "stress", "stress_gravity")
+
+
+def sweep(volume, theta_t=pi, theta_b=pi,
+          gamma=gamma_0, strain=0.0, grid=True):
+    """Sweep the droplet parameters
+    Each parameter is a scalar or a 1D list of values.
+    grid=True: outer product, result has shape
+               (volume, theta_t, theta_b, gamma, strain)
+    grid=False: the parameters are broadcast against each other
+    Returns a numpy structured array with the columns in `fields`
+    """
+    specs = [numpy.asarray(x, dtype=float)
+             for x in (volume, theta_t, theta_b, gamma, strain)]
+    if grid:
+        specs = [numpy.atleast_1d(x) for x in specs]
+        for x in specs:
+            if x.ndim != 1:
+                raise ValueError("Grid specs must be scalars or 1D lists")
+        # Open grid, every spec lives on its own axis
+        specs = numpy.ix_(*specs)
+    v0, t_t, t_b, gm, st = specs
+    # Initial state does not depend on the strain axis
+    h0 = initial_height(v0, t_t, t_b)
+    return evaluate(v0, t_t, t_b, gm, h0, h0 * (1 - st), st)
+
+
+def evaluate(v0, theta_t, theta_b, gamma, h0, h, strain):
+    """Evaluate all columns for broadcastable state arrays
+    Returns a numpy structured array with the columns in `fields`
+    """
+    r2_0 = -h0 / (cos(theta_t) + cos(theta_b))
+    r1_0 = solve_r1(h0, v0, theta_t, theta_b)
+    p0 = gamma * (1 / r1_0 + 1 / r2_0)
+    # Deformed state
+    delta_t, delta_b = split_h(h, theta_t, theta_b)
+    r1 = solve_r1(h, v0, theta_t, theta_b)
+    r2 = -h / (cos(theta_t) + cos(theta_b))
+    p = gamma * (1 / r1 + 1 / r2)
+    p_gravity = p + rho * h * g
+    columns = (v0, theta_t, theta_b, gamma, strain, h0, h,
+               r1, r2, delta_t, delta_b,
+               p, p_gravity, p - p0, p_gravity - (p0 + rho * h0 * g))
+    shape = numpy.broadcast(*columns).shape
+    res = numpy.empty(shape, dtype=[(f, float) for f in fields])
+    for f, col in zip(fields, columns):
+        res[f] = col
+    return res
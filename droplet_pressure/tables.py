@@ -0,0 +1,130 @@
+from __future__ import print_function
+import itertools
+import numpy
+from droplet_pressure.droplet import gamma_0, rho, g
+from droplet_pressure.droplet import initial_height
+from droplet_pressure.sweep import sweep
+
+"""Dimensionless stress-strain tables
+With all lengths scaled by h0, r1 / h0, r2 / h0 and delta_b / h0 only
+depend on (theta_t, theta_b, strain). The tables are built once on a
+grid and any (volume, gamma) is recovered by rescaling.
+"""
+
+quantities = ("r1", "r2", "delta_b")
+
+
+class StressTable(object):
+    """Parameters
+    theta_t, theta_b, strain: 1D increasing grid axes
+    r1, r2, delta_b: tabulated values scaled by h0, shape of the grid
+    error: max relative interpolation error per quantity, estimated
+           at the cell centers when the table is built
+    """
+
+    def __init__(self, theta_t, theta_b, strain,
+                 r1, r2, delta_b, error=None):
+        self.axes = tuple(numpy.atleast_1d(numpy.asarray(x, dtype=float))
+                          for x in (theta_t, theta_b, strain))
+        shape = tuple(len(x) for x in self.axes)
+        self.values = dict()
+        for name, val in zip(quantities, (r1, r2, delta_b)):
+            val = numpy.asarray(val, dtype=float)
+            if val.shape != shape:
+                raise ValueError("{} does not match the grid".format(name))
+            self.values[name] = val
+        self.error = error
+
+    @classmethod
+    def build(cls, theta_t, theta_b, strain):
+        """Tabulate the dimensionless quantities on the grid
+        """
+        res = sweep(1.0, theta_t, theta_b, strain=strain)[0, :, :, 0]
+        scaled = [res[name] / res["h0"] for name in quantities]
+        table = cls(theta_t, theta_b, strain, *scaled)
+        # Error estimate at the centers of the cells
+        mids = [(x[:-1] + x[1:]) / 2 if len(x) > 1 else x
+                for x in table.axes]
+        exact = sweep(1.0, *mids[:2], strain=mids[2])[0, :, :, 0]
+        tt, tb, st = numpy.meshgrid(*mids, indexing="ij")
+        table.error = dict()
+        for name in quantities:
+            ref = exact[name] / exact["h0"]
+            approx = table.interp(name, tt, tb, st)
+            table.error[name] = float(numpy.max(numpy.abs(approx / ref - 1)))
+        return table
+
+    def save(self, f_name):
+        """Save to a compressed numpy archive
+        """
+        error = [self.error.get(name, numpy.nan) if self.error else numpy.nan
+                 for name in quantities]
+        numpy.savez_compressed(f_name,
+                               theta_t=self.axes[0],
+                               theta_b=self.axes[1],
+                               strain=self.axes[2],
+                               error=error,
+                               **self.values)
+
+    @classmethod
+    def load(cls, f_name):
+        data = numpy.load(f_name)
+        error = dict(zip(quantities, map(float, data["error"])))
+        if numpy.isnan(list(error.values())).all():
+            error = None
+        return cls(data["theta_t"], data["theta_b"], data["strain"],
+                   *[data[name] for name in quantities],
+                   error=error)
+
+    def interp(self, name, theta_t, theta_b, strain):
+        """Linear interpolation of one scaled quantity
+        """
+        points = numpy.broadcast_arrays(*[numpy.asarray(x, dtype=float)
+                                          for x in (theta_t, theta_b,
+                                                    strain)])
+        index = []
+        weight = []
+        for x, axis in zip(points, self.axes):
+            eps = 1e-12 * (abs(axis[-1]) + 1)
+            if numpy.any(x < axis[0] - eps) or numpy.any(x > axis[-1] + eps):
+                raise ValueError("Point outside of the tabulated range")
+            if len(axis) == 1:
+                index.append(numpy.zeros(x.shape, dtype=int))
+                weight.append(numpy.zeros(x.shape))
+                continue
+            i = numpy.clip(numpy.searchsorted(axis, x) - 1,
+                           0, len(axis) - 2)
+            index.append(i)
+            weight.append(numpy.clip((x - axis[i]) / (axis[i + 1] - axis[i]),
+                                     0, 1))
+        val = self.values[name]
+        res = numpy.zeros(points[0].shape)
+        # Sum over the 8 corners of the cell
+        for corner in itertools.product((0, 1), repeat=3):
+            w = 1.0
+            idx = []
+            for c, i, wi, axis in zip(corner, index, weight, self.axes):
+                w = w * (wi if c else 1 - wi)
+                idx.append(numpy.minimum(i + c, len(axis) - 1))
+            res += w * val[tuple(idx)]
+        return res
+
+    def get_curve_pressure(self, v0, theta_t, theta_b, strain,
+                           gamma=gamma_0, gravity=False):
+        """Pressure of droplets with volume v0 rescaled from the table
+        """
+        h0 = initial_height(v0, theta_t, theta_b)
+        r1 = self.interp("r1", theta_t, theta_b, strain)
+        r2 = self.interp("r2", theta_t, theta_b, strain)
+        p = gamma / h0 * (1 / r1 + 1 / r2)
+        if gravity:
+            p = p + rho * h0 * (1 - numpy.asarray(strain)) * g
+        return p
+
+    def get_delta_stress(self, v0, theta_t, theta_b, strain,
+                         gamma=gamma_0, gravity=False):
+        p = self.get_curve_pressure(v0, theta_t, theta_b, strain,
+                                    gamma=gamma, gravity=gravity)
+        p0 = self.get_curve_pressure(v0, theta_t, theta_b, 0.0,
+                                     gamma=gamma, gravity=gravity)
+        return p - p0
@@ -3,6 +3,14 @@ import bmesh
 import numpy
 from math import pi, sin, cos
 import os, os.path
+from droplet_pressure.droplet import arc_profiles
+from droplet_pressure.schedule import Schedule
+from droplet_pressure.report import get_logger
+from droplet_pressure.export import read_params as read_binary
+from droplet_pressure.shape_keys import set_points, \
+    add_shape_keys as add_keys_bulk
+
+log = get_logger("blender_drop_anim")
 
 def gen_revolved(verts):
     """Generate revolved shape using vertices
@@ -12,9 +20,7 @@ def gen_revolved(verts):
     poly = curvData.splines.new("POLY")
     poly.points.add(len(verts))
     # Add vertices to the curve
-    for i in range(len(verts)):
-        x, y, z = verts[i]
-        poly.points[i].co = (x, y, z, 1)
+    set_points(poly.points, verts)
     curv_obj = bpy.data.objects.new("curveobj", curvData)
     mod = curv_obj.modifiers.new("screw", "SCREW")
     mod.use_smooth_shade = True
@@ -22,40 +28,45 @@ def gen_revolved(verts):
     mod.use_normal_flip = True #    
     return curv_obj
 
-def gen_verts(params, h0=1.7, resolution=64):
-    per, x0, y0, r2, t_b, t_t = params
-    x0 = x0 * h0
-    y0 = y0 * h0
-    r2 = r2 * h0
-    verts = []
-    # Add initial
-    verts.append([0, 0, 0])
-    # Add circles
-    for t in numpy.linspace(-(t_b - pi / 2), (t_t - pi / 2), resolution):
-        verts.append([0, x0 + r2 * cos(t), y0 + r2 * sin(t)])
-    # Final point
-    verts.append([0, 0, per * h0])
+def gen_verts_batch(param_lines, h0=1.7, resolution=64):
+    """Vertices of the revolved profile for all frames at once
+    Returns array (frames, resolution + 2, 3)
+    """
+    param_lines = numpy.atleast_2d(param_lines)
+    per, x0, y0, r2, t_b, t_t = param_lines.T[:6] * [[h0], [h0], [h0],
+                                                     [h0], [1], [1]]
+    arcs = arc_profiles(numpy.stack((x0, y0), axis=-1), r2, t_t, t_b,
+                        resolution=resolution)
+    verts = numpy.zeros((len(param_lines), resolution + 2, 3))
+    # Initial point at origin, circles, final point on the axis
+    verts[:, 1: -1, 1:] = arcs
+    verts[:, -1, 2] = per
     return verts
 
+def gen_verts(params, h0=1.7, resolution=64):
+    return gen_verts_batch(params, h0=h0, resolution=resolution)[0]
+
 def read_csv(f_name):
     param_lines = numpy.genfromtxt(f_name, 
                                    comments="#", 
                                    delimiter=",")
     return param_lines
 
+def read_params(f_name):
+    """Read the parameter lines, csv or memory-mapped binary
+    """
+    if f_name.endswith(".csv"):
+        return read_csv(f_name)
+    header, param_lines = read_binary(f_name)
+    return param_lines
+
 def add_shape_keys(curv_obj, param_lists):
     """Add shape keys for each single frames
     param_list is already the params without first line
     """
     curv_obj.shape_key_add("basis")
     curv_obj.data.shape_keys.use_relative = False
-    for i, params in enumerate(param_lists):
-        verts = gen_verts(params)
-        key = curv_obj.shape_key_add("step-{}".format(i))
-        for j, v in enumerate(verts):
-            x, y, z = v
-            key.data[j].co = (x, y, z)
-    
+    add_keys_bulk(curv_obj, gen_verts_batch(param_lists))
     return
 
 def gen_func_curve(total_x, #total length x-direction
@@ -69,31 +80,24 @@ def gen_func_curve(total_x, #total length x-direction
     total_frames = frames_section * repeat
     total_frames_render = total_frames / fine_grid
     
-    # velocity for x and y
-    v_x = total_x / total_frames; v_y = total_y / period / fine_grid
-    # frame stop points each section
-    start = 0; tp1 = period * fine_grid; tp2 = tp1 + stop * fine_grid; tp3 = tp2 + period * fine_grid
+    # velocity for x
+    v_x = total_x / total_frames
+    # press, stop, release and rest within each section
+    load = Schedule().ramp(total_y, period * fine_grid) \
+                     .hold(stop * fine_grid) \
+                     .ramp(0, period * fine_grid) \
+                     .hold(stop * fine_grid).repeat(repeat)
     # generate vertex
     verts = []
-    for i in range(total_frames):
+    for i, y in enumerate(load.strains[:total_frames]):
         x = i * v_x
-        i_section = i % frames_section #Which frame?
-        if i_section <= tp1:
-            y = i_section * v_y
-        elif i_section <= tp2:
-            y = total_y
-        elif i_section <= tp3:
-            y = (tp3 - i_section) * v_y
-        else:
-            y = 0
         verts.append((0, x, y, 1))
-    print(verts)
+    log.debug("%d points on the time curve", len(verts))
     curvData = bpy.data.curves.new("curve_func", type="CURVE")
     curvData.dimensions="3D"
     poly = curvData.splines.new("POLY")
     poly.points.add(len(verts))
-    for i, v in enumerate(verts):
-        poly.points[i].co = v
+    set_points(poly.points, verts)
     curv_obj = bpy.data.objects.new("curve_func_obj", curvData)
     bpy.context.scene.objects.link(curv_obj)
     curv_obj.data.materials.append(bpy.data.materials["glowing_mater"])
@@ -159,9 +163,9 @@ def gen_timeline(curv_obj,
         
 
 
-f_name = "/Users/tiantian/polybox/Research/3-(Done)-graphene-F16CuPc-hydrophobic/droplet-pressure/results/blender_input.csv"
+f_name = "/Users/tiantian/polybox/Research/3-(Done)-graphene-F16CuPc-hydrophobic/droplet-pressure/results/blender_input.bin"
 z_shift = 0.72
-param_lines = read_csv(f_name)
+param_lines = read_params(f_name)
 curv_obj = gen_revolved(gen_verts(param_lines[0]))
 scene = bpy.context.scene
 scene.objects.link(curv_obj)
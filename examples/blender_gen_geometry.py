@@ -1,5 +1,7 @@
 import droplet_pressure
 from droplet_pressure.droplet import Droplet
+from droplet_pressure.cache import R1Cache
+from droplet_pressure.export import ParamsWriter
 import numpy
 from numpy import sin, cos, radians, pi
 import os
@@ -23,26 +25,40 @@ def gen_params(drop, h):
                    r2 / h0, t_b, t_t)     # r2 and two angles
     return params_pack
 
+def params_from_state(drop, state):
+    """Same parameters as gen_params from a StrainState record
+    """
+    h0 = drop.h0
+    return (state.h / h0,
+            (state.r1 - state.r2) / h0,
+            state.delta_b / h0,
+            state.r2 / h0, drop.theta_b, drop.theta_t)
+
 def main(vol=3.0e-10,
          frames=8,
          theta_t=radians(145),
          theta_b=radians(165),
-         max_strain=0.25):
+         max_strain=0.25,
+         cache_file=None,       # persist r1 solutions between runs
+         fmt="bin"):            # "bin" (float64, lossless) or "csv"
+    cache = R1Cache(path=cache_file) if cache_file else None
     drop = Droplet(initial_volume=vol,
                    theta_t=theta_t,
-                   theta_b=theta_b)
+                   theta_b=theta_b,
+                   cache=cache)
     h0 = drop.h0
-    lines = []
-    lines.append("#Percentage,x0,y0,r2,theta_b,theta_t\n")
-    for h in numpy.linspace(h0, h0 * (1- max_strain), frames):
-        params = gen_params(drop, h)
-        line = ",".join(map(lambda s: "{:.3f}".format(s),
-                            params)) + "\n"
-        lines.append(line)
     curr_dir = os.path.dirname(abspath(__file__))
-    f_name = os.path.join(curr_dir, "../results", "blender_input.csv")
-    with open(f_name, "w") as f:
-        f.writelines(lines)
+    f_name = os.path.join(curr_dir, "../results",
+                          "blender_input.{}".format(fmt))
+    # Rows are streamed to the file as they are solved
+    with ParamsWriter(f_name, fmt=fmt, h0=h0, volume=vol,
+                      theta_t=theta_t, theta_b=theta_b,
+                      gamma=drop.gamma) as writer:
+        for state in drop.iter_strain(numpy.linspace(0, max_strain,
+                                                     frames)):
+            writer.write(params_from_state(drop, state))
+    if cache is not None:
+        cache.save()
 
     return
 
@@ -1,36 +1,38 @@
-from droplet_pressure.droplet import Droplet
+from droplet_pressure.droplet import Droplet, arc_profiles
+from droplet_pressure.report import get_logger, set_verbosity, \
+    FrameRecorder, Progress
+import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.patches import Arc, Path, PathPatch, Circle, FancyArrowPatch
 from matplotlib.animation import FuncAnimation, FFMpegFileWriter, FFMpegWriter
+from matplotlib.colors import to_rgba
+import multiprocessing
 import numpy
 from numpy import pi, sin, cos, radians
-from scipy.stats import linregress
+import io
 import os
 from os.path import abspath, dirname, join
 
-def gen_patches(drop, h, resolution=64):
-    """Generate patches for droplet at height h
+log = get_logger("pressure_animation")
+
+
+def patch_vertices(v_r):
+    """Closed droplet outline from the right meridians (..., n, 2)
+    The left meridian is the mirror image of the right one
+    """
+    v_l = v_r[..., ::-1, :] * numpy.array([-1, 1])
+    p_b = v_r[..., :1, :]
+    return numpy.concatenate((v_r, v_l, p_b, p_b), axis=-2)
+
+
+def make_patches(r1, r2, delta_b, t_t, t_b, resolution=64):
+    """Generate patches for droplet from the solved geometry
     """
-    # Generate arc starting form theta1 to theta2
-    def gen_arc(center, r, theta1, theta2):
-        t = numpy.linspace(theta1, theta2, resolution)
-        vert = r * numpy.vstack((numpy.cos(t),
-                                 numpy.sin(t))).T
-        return vert + center
-    print(h)
-    drop.h = h                  # set height and update
-    delta_t, delta_b = drop.get_separate_height()
-    r1 = drop.r1; r2 = drop.r2
-    t_t = drop.theta_t; t_b = drop.theta_b
     center_r = (r1 - r2, delta_b)
-    center_l = (-(r1 - r2), delta_b)
-    v_r = gen_arc(center_r, r2,
-                  -(t_b - pi / 2), (t_t - pi / 2))
-    v_l = gen_arc(center_l, r2,
-                  pi - (t_t - pi / 2),
-                  pi + (t_b - pi / 2))
-    p_b = v_r[0]; p_t = v_r[-1]
-    verts = numpy.concatenate((v_r, v_l, (p_b, p_b)))  # vertices for patch
+    v_r = arc_profiles(center_r, r2, t_t, t_b, resolution=resolution)
+    verts = patch_vertices(v_r)  # vertices for patch
+    p_t = v_r[-1]
+    pr = (r1, delta_b)
     codes = [Path.MOVETO] + [Path.LINETO] * (resolution * 2) \
             + [Path.CLOSEPOLY]  # codes for path
     drop_patch = PathPatch(Path(verts, codes),
@@ -41,7 +43,7 @@ def gen_patches(drop, h, resolution=64):
                     linewidth=0.5,
                     edgecolor="#ffb4a5")
 
-    arr1 = FancyArrowPatch((0, delta_b), (r1, delta_b),
+    arr1 = FancyArrowPatch((0, delta_b), pr,
                            mutation_scale=10,
                            linewidth=0,
                            facecolor="#9b9b9b")
@@ -50,27 +52,84 @@ def gen_patches(drop, h, resolution=64):
                            mutation_scale=10,
                            linewidth=0,
                            facecolor="#ffa047")
+    return drop_patch, circle, arr1, arr2, pr, p_t
 
+
+def update_patches(patches, frames, k):
+    """Move the existing patches to the state k of the frames in place
+    """
+    drop_patch, circle, arr1, arr2 = patches
+    center_r = frames["centers"][k]
+    delta_b = frames["delta_b"][k]
+    pr = (frames["r1"][k], delta_b)
+    p_t = frames["verts"][k, frames["resolution"] - 1]
+    drop_patch.get_path().vertices[:] = frames["verts"][k]
+    circle.set_center(center_r)
+    circle.set_radius(frames["r2"][k])
+    arr1.set_positions((0, delta_b), pr)
+    arr2.set_positions(center_r, p_t)
+    return pr, p_t
+
+
+def gen_patches(drop, h, resolution=64):
+    """Generate patches for droplet at height h
+    """
+    log.debug("h = %s", h)
+    drop.h = h                  # set height and update
+    delta_t, delta_b = drop.get_separate_height()
+    drop_patch, circle, arr1, arr2, pr, p_t = \
+        make_patches(drop.r1, drop.r2, delta_b,
+                     drop.theta_t, drop.theta_b,
+                     resolution=resolution)
     pressure = drop.get_delta_stress()
-    pr = (r1, delta_b)
-    print(pr, p_t)
+    log.debug("r1 point %s, top point %s", pr, p_t)
     return drop_patch, circle, arr1, arr2, \
            pressure, pr, p_t
 
-def main(vol=3.0e-10,
-         theta_t=radians(145),
-         theta_b=radians(165),
-         total_frames=56,
-         start_frames=6,        # Show R1 = R2
-         final_frames=4,
-         show=False):
-    drop = Droplet(initial_volume=vol,
-                   theta_t=theta_t,
-                   theta_b=theta_b)
+
+def gen_frames(drop,
+               total_frames=56,
+               start_frames=6,
+               final_frames=4,
+               max_strain=0.25,
+               resolution=64):
+    """Precompute the geometry of all frames in one batch
+    Frames before start_frames stay at h0, the final_frames keep
+    the last compressed state.
+    """
     h0 = drop.h0
-    print(h0)
+    n_move = total_frames - final_frames - start_frames
+    hs = h0 - max_strain / (n_move - 1) * numpy.arange(n_move) * h0
+    r1, r2, delta_t, delta_b, p = drop.solve_heights(hs)
+    centers = numpy.stack((r1 - r2, delta_b), axis=-1)
+    v_r = arc_profiles(centers, r2, drop.theta_t, drop.theta_b,
+                       resolution=resolution)
+    strain = 1 - hs / h0
+    stress = p - drop.p0
+    # Preallocated stress-strain line, frames show a prefix of it
+    line_strain = numpy.concatenate(([0], strain))
+    line_stress = numpy.concatenate((stress[:1], stress))
+    return dict(h0=h0, h=hs, r1=r1, r2=r2, delta_b=delta_b,
+                centers=centers, verts=patch_vertices(v_r),
+                resolution=resolution,
+                strain=strain, stress=stress,
+                line_strain=line_strain, line_stress=line_stress,
+                theta_t=drop.theta_t, theta_b=drop.theta_b,
+                modulus=drop.get_modulus(),
+                total_frames=total_frames,
+                start_frames=start_frames,
+                final_frames=final_frames,
+                max_strain=max_strain)
+
+
+def setup_figure(frames, style="science"):
+    """Create the figure and the artists for the frames
+    Returns the figure and the list of animated artists
+    """
+    h0 = frames["h0"]
     fig = plt.figure(figsize=(6, 3))
-    plt.style.use("science")
+    if style is not None:
+        plt.style.use(style)
     # Setup acis
     ax1 = fig.add_subplot(121, aspect="equal")
     ax2 = fig.add_subplot(122)
@@ -84,94 +143,235 @@ def main(vol=3.0e-10,
     # ax1.set_axis_off()
     ax1.set_title(("Laplace Pressure $p = "
                    " \\gamma (R_{1}^{-1} + R_{2}^{-1})$"))
-    ax2.set_xlim(0, 0.25)
+    ax2.set_xlim(0, frames["max_strain"])
     ax2.set_ylim(0, 300)
     ax2.set_xlabel("Strain")
     ax2.set_ylabel("Stress (Pa)")
     # access patches
-    dp, c, arr1, arr2, pre, pr, pt = gen_patches(drop, h0)
+    dp, c, arr1, arr2, pr, pt = make_patches(frames["r1"][0],
+                                             frames["r2"][0],
+                                             frames["delta_b"][0],
+                                             frames["theta_t"],
+                                             frames["theta_b"],
+                                             frames["resolution"])
     patches = [ax1.add_patch(p) for p in (dp, c, arr1, arr2)]
-    line,  = ax2.plot([0], [pre], "-")
+    line,  = ax2.plot([0], [frames["stress"][0]], "-")
     patches.append(line)
-    text1 = ax1.annotate(xy=pr, s="$R_{1}$",
+    text1 = ax1.annotate("$R_{1}$", xy=pr,
                          ha="left", va="center",
                          color="#9b9b9b")
-    text2 = ax1.annotate(xy=pt, s="$R_{2}$",
+    text2 = ax1.annotate("$R_{2}$", xy=pt,
                          ha="left",
                          va="bottom",
                          color="#ffa047")
     patches += [text1, text2]
-    # # Additional for plotting the linear regression
+    # # Additional for plotting the small-strain modulus
     reg_line, = ax2.plot([], [], "--",
                         color="#ffae51")
-    text3 = ax2.annotate(xy=(0, 0), s="", color="black")
-    text4 = ax1.annotate(xy=(0, 0), s="", color="black")
+    text3 = ax2.annotate("", xy=(0, 0), color="black")
+    text4 = ax1.annotate("", xy=(0, 0), color="black")
     patches += [reg_line, text3, text4]
-    print(len(patches))
-    reg_xy = [None, None]
-    
-    # update frames
+    # Layout with the first frame drawn, as the blitting
+    # FuncAnimation does on creation
+    draw_frame(patches, frames, 0)
+    plt.tight_layout()
+    return fig, patches
+
+
+def frame_state(frames, i):
+    """Index of the droplet state shown in frame i
+    """
+    start_frames = frames["start_frames"]
+    if i < start_frames:
+        return 0
+    return min(i - start_frames,
+               frames["total_frames"] - frames["final_frames"]
+               - start_frames - 1)
+
+
+def draw_frame(patches, frames, i):
+    """Update the artists to frame i
+    Only depends on i, so frames can be drawn in any order
+    """
+    h0 = frames["h0"]
+    total_frames = frames["total_frames"]
+    start_frames = frames["start_frames"]
+    final_frames = frames["final_frames"]
+    k = frame_state(frames, i)
+    text4 = patches[-1]
+    if  i < start_frames:
+        # only add the frames showing R1 = R2
+        text4.set_text("Zero strain, $R_{1}=R_{2}$")
+        text4.set_x(0.05 * h0); text4.set_y(1.2 * h0)
+        text4.set_horizontalalignment("left")
+        text4.set_verticalalignment("center")
+    else:
+        text4.set_text("")  # mute the text output
+    # update the patches and pressure
+    pr, pt = update_patches(patches[:4], frames, k)
+    n = k + 1 if i >= start_frames else 0
+    l = patches[4]
+    l.set_data((frames["line_strain"][:n + 1],
+                frames["line_stress"][:n + 1]))
+    text1, text2 = patches[5:7]
+    text1.set_x(pr[0]); text1.set_y(pr[1]);
+    text2.set_x(pt[0]); text2.set_y(pt[1]);
+    # Update the elastic modulus
+    i_frame = max(i - (total_frames - final_frames) + 1, 0)
+    xx = numpy.linspace(0, frames["max_strain"], final_frames)
+    # Analytic slope at zero strain, where the stress is zero
+    yy = frames["modulus"] * xx
+    l2 = patches[7]
+    l2.set_data((xx[:i_frame], yy[:i_frame]))
+    # Add the modulus value to last frame
+    text3 = patches[8]
+    if i == total_frames - 1:
+        text3.set_x(xx[1]); text3.set_y(yy[1])
+        s = "{:.1e}".format(frames["modulus"]).split("e")
+        base = float(s[0]); p = int(s[1])
+        text3.set_text("Elastic Modulus: {0}$\\times$10$^{{{1}}}$ Pa".format(base, p))
+        text3.set_verticalalignment("top")
+        text3.set_horizontalalignment("left")
+    else:
+        text3.set_text("")
+    return patches
+
+
+class RawFrameWriter(FFMpegWriter):
+    """FFMpegWriter fed with frames rendered outside of the figure
+    """
+
+    def grab_raw(self, data):
+        self._proc.stdin.write(data)
+
+
+# Figure owned by each render worker
+_worker = dict()
+
+
+def savefig_kwargs_for(writer, fig, savefig_kwargs):
+    """Keyword arguments of savefig as Animation.save passes them
+    to a writer that may not support transparency, the writer
+    must be set up already
+    """
+    savefig_kwargs = dict(savefig_kwargs)
+    supports_transparency = getattr(writer, "_supports_transparency",
+                                    lambda: True)
+    if not supports_transparency():
+        facecolor = savefig_kwargs.get("facecolor",
+                                       matplotlib.rcParams["savefig.facecolor"])
+        if facecolor == "auto":
+            facecolor = fig.get_facecolor()
+        r, g, b, a = to_rgba(facecolor)
+        # Pre-composite to white
+        savefig_kwargs["facecolor"] = a * numpy.array([r, g, b]) + 1 - a
+        savefig_kwargs["transparent"] = False
+    return savefig_kwargs
+
+
+def _init_worker(frames, style, size, dpi, savefig_kwargs):
+    plt.switch_backend("Agg")
+    fig, patches = setup_figure(frames, style=style)
+    fig.set_size_inches(*size)
+    _worker.update(fig=fig, patches=patches, frames=frames, dpi=dpi,
+                   savefig_kwargs=savefig_kwargs)
+
+
+def _render_frame(i):
+    """Render frame i as raw rgba, same as FFMpegWriter.grab_frame
+    """
+    draw_frame(_worker["patches"], _worker["frames"], i)
+    buf = io.BytesIO()
+    with matplotlib.rc_context({"savefig.bbox": None}):
+        _worker["fig"].savefig(buf, format="rgba",
+                               dpi=_worker["dpi"],
+                               **_worker["savefig_kwargs"])
+    return buf.getvalue()
+
+
+def render_parallel(frames, f_name, workers=None,
+                    style="science", dpi=600, fps=12, progress=None):
+    """Render the frames with the Agg backend in a process pool
+    and stitch them in order with ffmpeg
+    progress: optional callback(frames_done, frames_total)
+    """
+    plt.switch_backend("Agg")
+    fig, _ = setup_figure(frames, style=style)
+    writer = RawFrameWriter(fps=fps,
+                            codec="libx264",
+                            extra_args=["-pix_fmt", "yuv420p",
+                                        "-crf", "20"])
+    with writer.saving(fig, f_name, dpi):
+        savefig_kwargs = savefig_kwargs_for(writer, fig,
+                                            {"transparent": True})
+        # The writer may adjust the figure size
+        size = tuple(fig.get_size_inches())
+        pool = multiprocessing.Pool(workers,
+                                    initializer=_init_worker,
+                                    initargs=(frames, style, size, dpi,
+                                              savefig_kwargs))
+        try:
+            for i, data in enumerate(pool.imap(
+                    _render_frame, range(frames["total_frames"]))):
+                writer.grab_raw(data)
+                if progress is not None:
+                    progress(i + 1, frames["total_frames"])
+        finally:
+            pool.terminate()
+            pool.join()
+    plt.close(fig)
+
+
+def main(vol=3.0e-10,
+         theta_t=radians(145),
+         theta_b=radians(165),
+         total_frames=56,
+         start_frames=6,        # Show R1 = R2
+         final_frames=4,
+         show=False,
+         parallel=False,       # headless rendering in a process pool
+         workers=None,
+         verbose=0,            # 1: progress, 2: debug output
+         record_file=None):    # csv of the per-frame states
+    if verbose:
+        set_verbosity(verbose)
+    drop = Droplet(initial_volume=vol,
+                   theta_t=theta_t,
+                   theta_b=theta_b)
+    h0 = drop.h0
+    log.info("h0 = %s", h0)
     # limit to 0.25 * h
+    frames = gen_frames(drop, total_frames=total_frames,
+                        start_frames=start_frames,
+                        final_frames=final_frames)
+    curr_dir = dirname(abspath(__file__))
+    f_name = join(curr_dir, "../results", "anim_pres.mp4")
+    progress = Progress(total_frames, name="frames", log=log)
+    recorder = FrameRecorder(("frame", "h", "strain", "stress"),
+                             f_name=record_file)
+    for i in range(total_frames):
+        k = frame_state(frames, i)
+        recorder.record(i, frames["h"][k], frames["strain"][k],
+                        frames["stress"][k])
+    recorder.flush()
+    if parallel and not show:
+        log.info("Rendering %s", f_name)
+        render_parallel(frames, f_name, workers=workers,
+                        progress=progress)
+        return
+    fig, patches = setup_figure(frames)
+
+    # update frames
     def update(i):
-        print(i)
-        if  i < start_frames:
-            # only add the frames showing R1 = R2
-            text4 = patches[-1]
-            text4.set_text("Zero strain, $R_{1}=R_{2}$")
-            text4.set_x(0.05 * h0); text4.set_y(1.2 * h0)
-            text4.set_horizontalalignment("left")
-            text4.set_verticalalignment("center")
-        elif i < (total_frames - final_frames):
-            text4 = patches[-1]
-            if text4.get_text() != "":
-                text4.set_text("")  # mute the text output
-            # update the patches and pressure only
-            h = h0 - 0.25 / (total_frames - final_frames - start_frames - 1) * (i - start_frames) * h0
-            sigma = 1 - h / h0
-            ax1.patches = []
-            dp, c, arr1, arr2, pre, pr, pt = gen_patches(drop, h)
-            patches[:4] = [ax1.add_patch(p) for p in \
-                           [dp, c, arr1, arr2]]
-            l = patches[4]
-            x, y = l.get_data()
-            l.set_data((numpy.concatenate((x, [sigma])),
-                        numpy.concatenate((y, [pre]))))
-            text1, text2 = patches[5:7]
-            text1.set_x(pr[0]); text1.set_y(pr[1]);
-            text2.set_x(pt[0]); text2.set_y(pt[1]);
-        else:
-            # Update the elastic modulus
-            nonlocal reg_xy     # declare reg_xy not only in this scope
-            if reg_xy[0] is None:
-                l = patches[4]
-                x, y = l.get_data()
-                slope, intercept, *_ = linregress(x[:5], y[:5])
-                reg_xy = [slope, intercept]
-                print(reg_xy)
-            i_frame = i - (total_frames - final_frames) + 1
-            xx = numpy.linspace(0, 0.25, final_frames)
-            yy = reg_xy[0] * xx + reg_xy[1]
-            l2 = patches[7]
-            l2.set_data((xx[:i_frame], yy[:i_frame]))
-            # Add the fitted value to last frame
-            if i == total_frames - 1:
-                text3 = patches[8]
-                text3.set_x(xx[1]); text3.set_y(yy[1])
-                s = "{:.1e}".format(reg_xy[0]).split("e")
-                base = float(s[0]); p = int(s[1])
-                text3.set_text("Elastic Modulus: {0}$\\times$10$^{{{1}}}$ Pa".format(base, p))
-                text3.set_verticalalignment("top")
-                text3.set_horizontalalignment("left")
-        return patches
+        progress(i + 1)
+        return draw_frame(patches, frames, i)
 
     ani = FuncAnimation(fig, update, frames=total_frames, blit=True)
-    plt.tight_layout()
     if show:
         plt.show()
     else:
-        curr_dir = dirname(abspath(__file__))
-        print(curr_dir)
-        ani.save(join(curr_dir, "../results", "anim_pres.mp4"),
+        log.info("Saving %s", f_name)
+        ani.save(f_name,
                 writer=FFMpegWriter(fps=12,
                                     codec="libx264",
                                     extra_args=["-pix_fmt", "yuv420p",
@@ -0,0 +1,117 @@
+from droplet_pressure.droplet import Droplet, radians, V_sym, newton_r1, \
+    solve_r1, fsolve_r1, Continuation, VolumeKernel, split_h, dV_sym
+import numpy
+import unittest
+
+
+class TestBatch(unittest.TestCase):
+    def test_solve_heights(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        hs = numpy.linspace(d.h0, d.h0 * 0.75, 8)
+        r1, r2, delta_t, delta_b, p = d.solve_heights(hs)
+        for i, h in enumerate(hs):
+            d.h = h
+            dt, db = d.get_separate_height()
+            self.assertAlmostEqual(r1[i] / d.r1, 1.0, places=8,
+                                   msg="batched r1 is wrong!")
+            self.assertAlmostEqual(r2[i] / d.r2, 1.0, places=8)
+            self.assertAlmostEqual(delta_b[i] / db, 1.0, places=8)
+            self.assertAlmostEqual(p[i] / d.get_curve_pressure(), 1.0,
+                                   places=8)
+
+    def test_volume(self):
+        v0 = 1.0e-10
+        theta_t, theta_b = radians(120), radians(170)
+        d = Droplet(initial_volume=v0, theta_t=theta_t, theta_b=theta_b)
+        hs = numpy.linspace(d.h0, d.h0 * 0.5, 100)
+        r1 = newton_r1(hs, v0, theta_t, theta_b)
+        _, _, delta_t, delta_b, _ = d.solve_heights(hs)
+        v = (V_sym(r1, delta_t, theta_t) + V_sym(r1, delta_b, theta_b)) / 2
+        self.assertTrue(numpy.allclose(v, v0, rtol=1e-10),
+                        msg="volume constraint violated!")
+
+    def test_kernel(self):
+        theta_t, theta_b = radians(135), radians(160)
+        kernel = VolumeKernel(theta_t, theta_b)
+        hs = numpy.linspace(1e-4, 5e-4, 7)[:, None]
+        R = numpy.linspace(2e-4, 9e-4, 5)[None, :]
+        delta_t, delta_b = split_h(hs, theta_t, theta_b)
+        v = (V_sym(R, delta_t, theta_t) + V_sym(R, delta_b, theta_b)) / 2
+        dv = (dV_sym(R, delta_t, theta_t) + dV_sym(R, delta_b, theta_b)) / 2
+        self.assertTrue(numpy.allclose(kernel.volume(R, hs), v, rtol=1e-12),
+                        msg="kernel volume is wrong!")
+        self.assertTrue(numpy.allclose(kernel.dvolume(R, hs), dv,
+                                       rtol=1e-12))
+
+    def test_analytic(self):
+        v0 = 3.0e-10
+        for theta_t, theta_b in ((145, 165), (180, 180), (100, 175)):
+            theta_t, theta_b = radians(theta_t), radians(theta_b)
+            d = Droplet(initial_volume=v0, theta_t=theta_t, theta_b=theta_b)
+            hs = numpy.linspace(d.h0, d.h0 * 0.5, 5)
+            r1 = solve_r1(hs, v0, theta_t, theta_b, check=True)
+            for h, r in zip(hs, r1):
+                self.assertAlmostEqual(r / fsolve_r1(h, v0, theta_t, theta_b),
+                                       1.0, places=8,
+                                       msg="analytic r1 is wrong!")
+
+    def test_inverse(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        hs = numpy.linspace(d.h0 * 0.3, d.h0, 6)
+        *_, p = d.solve_heights(hs, gravity=True)
+        h = d.get_height_for_pressure(p, gravity=True)
+        self.assertTrue(numpy.allclose(h, hs, rtol=1e-10),
+                        msg="inverse pressure solve is wrong!")
+        strain = d.get_strain_for_pressure(150.0, delta=True)
+        d.h = d.h0 * (1 - strain)
+        self.assertAlmostEqual(d.get_delta_stress(), 150.0, places=6)
+        with self.assertRaises(ValueError):
+            d.get_height_for_pressure(-1.0, delta=True)
+
+    def test_profiles(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        hs = numpy.linspace(d.h0, d.h0 * 0.75, 10)
+        verts, centers, r2 = d.get_profiles(hs, resolution=32)
+        self.assertEqual(verts.shape, (10, 32, 2))
+        # Contact points on the plates
+        self.assertTrue(numpy.allclose(verts[:, 0, 1], 0, atol=1e-15))
+        self.assertTrue(numpy.allclose(verts[:, -1, 1], hs))
+        # All points on the meridian circle
+        dist = numpy.linalg.norm(verts - centers[:, None, :], axis=-1)
+        self.assertTrue(numpy.allclose(dist, r2[:, None]))
+
+    def test_iter_strain(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        strains = numpy.linspace(0, 0.25, 20)
+        states = list(d.iter_strain(iter(strains)))
+        r1, r2, delta_t, delta_b, p = d.solve_heights(d.h0 * (1 - strains))
+        self.assertTrue(numpy.allclose([s.r1 for s in states], r1))
+        self.assertTrue(numpy.allclose([s.delta_b for s in states], delta_b))
+        self.assertTrue(numpy.allclose([s.pressure for s in states], p))
+        self.assertEqual(d.h, d.h0)
+
+    def test_continuation(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(100),
+                    theta_b=radians(175))
+        strains = numpy.linspace(0, 0.6, 100)
+        c = Continuation(d)
+        states = list(d.iter_strain(strains, continuation=c))
+        r1 = solve_r1(d.h0 * (1 - strains), d.v0, d.theta_t, d.theta_b)
+        self.assertTrue(numpy.allclose([s.r1 for s in states], r1,
+                                       rtol=1e-10))
+        self.assertEqual(len(c.iterations), 100)
+        self.assertLessEqual(max(c.iterations[2:]), 2)
+        self.assertLess(max(c.residuals), 1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
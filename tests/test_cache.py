@@ -0,0 +1,50 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.cache import R1Cache
+import os
+import tempfile
+import unittest
+
+
+class TestCache(unittest.TestCase):
+    def test_hits(self):
+        cache = R1Cache(maxsize=4)
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165),
+                    cache=cache)
+        ref = Droplet(initial_volume=3.0e-10,
+                      theta_t=radians(145),
+                      theta_b=radians(165))
+        hs = [d.h0 * (1 - 0.05 * i) for i in range(3)]
+        for h in hs + hs:
+            d.h = h
+            ref.h = h
+            self.assertEqual(d.r1, ref.r1)
+        # 3 distinct heights
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 3)
+        # Within the quantization tolerance
+        d.h = hs[1] * (1 + 1e-13)
+        d.r1
+        self.assertEqual(cache.hits, 4)
+        for i in range(4):
+            d.h = d.h0 * (0.5 + 0.01 * i)
+            d.r1
+        self.assertEqual(len(cache), 4)
+
+    def test_persist(self):
+        f_name = os.path.join(tempfile.mkdtemp(), "r1.cache")
+        cache = R1Cache(path=f_name)
+        d = Droplet(initial_volume=1.0e-10, cache=cache)
+        d.h = d.h0 * 0.8
+        d.get_curve_pressure()
+        cache.save()
+        cache2 = R1Cache(path=f_name)
+        self.assertEqual(len(cache2), len(cache))
+        self.assertEqual(cache2.solve(d.v0, d.theta_t, d.theta_b, d.h),
+                         d.r1)
+        self.assertEqual(cache2.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
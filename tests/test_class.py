@@ -32,5 +32,38 @@ class TestClass(unittest.TestCase):
         p2 = d.get_delta_stress(gravity=True)
         print(d.p0, p1, p2)
 
+    def test_lazy(self):
+        d = Droplet(initial_volume=1.0e-10)
+        d.h = d.h0 / 2
+        r2 = d.r2
+        self.assertAlmostEqual(d.get_separate_height()[0], d.h0 / 4)
+        # Changing the angles refreshes the initial state
+        d.theta_t = 0.8 * pi
+        ref = Droplet(initial_volume=1.0e-10, theta_t=0.8 * pi)
+        self.assertAlmostEqual(d.h0 / ref.h0, 1.0, places=10)
+        self.assertAlmostEqual(d.p0 / ref.p0, 1.0, places=10)
+        ref.h = d.h
+        self.assertAlmostEqual(d.r1 / ref.r1, 1.0, places=10)
+        self.assertNotEqual(d.r2, r2)
+        # h follows h0 until assigned
+        d = Droplet(initial_volume=1.0e-10)
+        d.v0 = 2.0e-10
+        self.assertEqual(d.h, d.h0)
+        self.assertAlmostEqual(d.get_delta_stress(), 0.0)
+
+    def test_modulus(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=0.8 * pi, theta_b=0.9 * pi)
+        eps = 1e-6
+        d.h = d.h0 * (1 - eps)
+        p1 = d.get_delta_stress(gravity=True)
+        d.h = d.h0 * (1 + eps)
+        p2 = d.get_delta_stress(gravity=True)
+        self.assertAlmostEqual(d.get_modulus(gravity=True)
+                               / ((p1 - p2) / (2 * eps)),
+                               1.0, places=5,
+                               msg="elastic modulus is wrong!")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+from droplet_pressure.cli import ShardedSweep, main, manifest_name
+from droplet_pressure.droplet import radians
+from droplet_pressure.sweep import sweep
+import json
+import numpy
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_resume(self):
+        out = os.path.join(self.dir, "sweep")
+        job = ShardedSweep([1e-10, 3e-10], [130, 150, 180], [165],
+                           [0.485], numpy.linspace(0, 0.25, 7),
+                           out=out, shard_size=8)
+        self.assertEqual(job.shards, 6)
+        self.assertEqual(job.run(), 6)
+        ref = sweep([1e-10, 3e-10], radians([130, 150, 180]),
+                    radians(165), 0.485, numpy.linspace(0, 0.25, 7))
+        res = job.read()
+        self.assertTrue(numpy.allclose(res["stress"],
+                                       ref["stress"].ravel()))
+        # Interrupted run, shard 2 is missing
+        os.remove(job.path(2))
+        calls = []
+        self.assertEqual(job.run(resume=True, workers=2,
+                                 progress=lambda *a: calls.append(a)),
+                         1)
+        self.assertEqual(calls, [(34, 42), (42, 42)])
+        self.assertEqual(job.done(), list(range(6)))
+        self.assertTrue(numpy.array_equal(job.read(), res))
+        # Different sweep in the same directory
+        other = ShardedSweep([1e-10], [130], [165], [0.485], [0.1],
+                             out=out, shard_size=8)
+        with self.assertRaises(ValueError):
+            other.run(resume=True)
+
+    def test_main(self):
+        out = os.path.join(self.dir, "sweep")
+        config = os.path.join(self.dir, "config.json")
+        with open(config, "w") as f:
+            json.dump(dict(volume=3e-10, theta_t=145, theta_b=165,
+                           strain="0:0.25:11", fmt="csv"), f)
+        self.assertEqual(main(["--config", config, "--out", out,
+                               "--shard-size", "4"]), 0)
+        self.assertEqual(sorted(os.listdir(out)),
+                         [manifest_name] + ["shard-{:05d}.csv".format(i)
+                                            for i in range(3)])
+        job = ShardedSweep([3e-10], [145], [165], [0.485],
+                           numpy.linspace(0, 0.25, 11), out=out,
+                           fmt="csv", shard_size=4)
+        res = job.read()
+        ref = sweep(3e-10, radians(145), radians(165),
+                    strain=numpy.linspace(0, 0.25, 11), grid=False)
+        self.assertTrue(numpy.allclose(res["pressure"], ref["pressure"],
+                                       rtol=1e-12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+from droplet_pressure.export import write_params, read_params, \
+    write_params_csv, ParamsWriter
+import numpy
+import os
+import tempfile
+import unittest
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.params = numpy.random.RandomState(0).rand(10, 6)
+
+    def test_binary(self):
+        f_name = os.path.join(self.dir, "params.bin")
+        write_params(f_name, self.params, h0=7.5e-4, volume=3.0e-10,
+                     theta_t=2.5, theta_b=2.9)
+        header, params = read_params(f_name)
+        self.assertIsInstance(params, numpy.memmap)
+        self.assertTrue(numpy.array_equal(params, self.params),
+                        msg="binary round trip is lossy!")
+        self.assertEqual(header["h0"], 7.5e-4)
+        self.assertEqual(header["theta_b"], 2.9)
+        self.assertEqual((header["rows"], header["cols"]), (10, 6))
+        del params
+        # Truncated file
+        with open(f_name, "r+b") as f:
+            f.truncate(os.path.getsize(f_name) - 8)
+        with self.assertRaises(ValueError):
+            read_params(f_name, mmap=False)
+
+    def test_stream(self):
+        f_name = os.path.join(self.dir, "stream.bin")
+        with ParamsWriter(f_name, h0=1.0) as writer:
+            for row in self.params:
+                writer.write(row)
+        header, params = read_params(f_name, mmap=False)
+        self.assertEqual(header["rows"], 10)
+        self.assertTrue(numpy.array_equal(params, self.params))
+
+    def test_csv(self):
+        f_name = os.path.join(self.dir, "params.csv")
+        write_params_csv(f_name, self.params)
+        params = numpy.genfromtxt(f_name, comments="#", delimiter=",")
+        self.assertTrue(numpy.allclose(params, self.params, atol=5e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.gravity import GravityDroplet
+import numpy
+import unittest
+
+
+class TestGravity(unittest.TestCase):
+    def test_sphere(self):
+        # Without gravity the undeformed droplet is a truncated sphere
+        for angles in ((180, 180), (145, 165)):
+            d = Droplet(3.0e-10, *radians(angles))
+            gd = GravityDroplet(3.0e-10, *radians(angles), rho=0)
+            r1, r2, _, delta_b, p = gd.solve_heights(d.h0)
+            self.assertAlmostEqual(p / d.p0, 1.0, places=8)
+            self.assertAlmostEqual(r1 / d.r1, 1.0, places=8)
+            self.assertAlmostEqual(r2 / d.r2, 1.0, places=8)
+            self.assertAlmostEqual(delta_b / d.get_separate_height()[1],
+                                   1.0, places=8)
+        # The zero-force state is the truncated sphere
+        d = Droplet(3.0e-10, radians(145), radians(165))
+        gd = GravityDroplet(3.0e-10, radians(145), radians(165), rho=0)
+        self.assertAlmostEqual(gd.h0 / d.h0, 1.0, places=8)
+        self.assertAlmostEqual(gd.p0 / d.p0, 1.0, places=8)
+
+    def test_gravity(self):
+        rho_si = 13.6e3
+        gd = GravityDroplet(3.0e-10, radians(145), radians(165),
+                            rho=rho_si)
+        hs = numpy.linspace(gd.h0, gd.h0 * 0.75, 20)
+        r1, r2, delta_t, delta_b, p = gd.solve_heights(hs)
+        p_b = gd.solve_heights(hs, gravity=True)[-1]
+        self.assertTrue(numpy.allclose(p_b - p, rho_si * 9.80665 * delta_b))
+        # Gravity lowers the equator
+        d = Droplet(3.0e-10, radians(145), radians(165))
+        _, _, _, delta_b_0, _ = d.solve_heights(hs)
+        self.assertTrue(numpy.all(delta_b < delta_b_0))
+        # Batched and single solves agree
+        gd.h = hs[7]
+        self.assertAlmostEqual(gd.get_curve_pressure() / p[7], 1.0,
+                               places=8)
+        self.assertAlmostEqual(gd.r1 / r1[7], 1.0, places=8)
+        self.assertGreater(gd.get_delta_stress(), 0)
+
+    def test_bond(self):
+        # Bond number about 3, the sphere height has no convex profile
+        gd = GravityDroplet(3.0e-8, radians(145), radians(165))
+        self.assertGreater(gd.bond, 3)
+        self.assertLess(gd.h0, 0.75 * gd.h_sphere)
+        self.assertGreater(gd.p0_gravity, gd.p0)
+        hs = numpy.linspace(gd.h0, gd.h0 * 0.8, 5)
+        *_, p = gd.solve_heights(hs)
+        self.assertAlmostEqual(p[0] / gd.p0, 1.0, places=8)
+        self.assertTrue(numpy.all(numpy.diff(p) > 0))
+        gd.h = hs[2]
+        self.assertGreater(gd.get_delta_stress(), 0)
+        # Heights without a profile are nan and reported
+        with self.assertLogs("droplet_pressure.gravity", "WARNING"):
+            *_, p = gd.solve_heights([gd.h0, gd.h_sphere])
+        self.assertTrue(numpy.isfinite(p[0]))
+        self.assertTrue(numpy.isnan(p[1]))
+        self.assertEqual(gd.failures, 1)
+
+    def test_point_contact(self):
+        # theta_t = pi: h0 is the apex height of the sessile droplet
+        gd = GravityDroplet(3.0e-10, rho=0)
+        self.assertAlmostEqual(gd.h0 / gd.h_sphere, 1.0, places=8)
+        for angles in ((180, 180), (180, 165)):
+            gd = GravityDroplet(3.0e-8, *radians(angles), rho=13.6e3)
+            self.assertLess(gd.h0, gd.h_sphere)
+            self.assertGreater(gd.p0_gravity, gd.p0)
+            hs = gd.h0 * numpy.array([1, 0.999, 0.9])
+            *_, p = gd.solve_heights(hs)
+            self.assertAlmostEqual(p[0] / gd.p0, 1.0, places=8)
+            self.assertTrue(numpy.all(numpy.diff(p) > 0))
+            gd.h = hs[2]
+            self.assertGreater(gd.get_delta_stress(), 0)
+        # Default angles and density
+        gd = GravityDroplet(3.0e-10)
+        gd.h = 0.9 * gd.h0
+        self.assertGreater(gd.get_delta_stress(gravity=True), 0)
+
+    def test_profiles(self):
+        gd = GravityDroplet(3.0e-10, radians(145), radians(165),
+                            rho=13.6e3)
+        hs = numpy.linspace(gd.h0, gd.h0 * 0.75, 4)
+        verts, centers, r2 = gd.get_profiles(hs, resolution=2001)
+        self.assertEqual(verts.shape, (4, 2001, 2))
+        r, z = verts[..., 0], verts[..., 1]
+        self.assertTrue(numpy.allclose(z[:, 0], 0, atol=1e-12))
+        self.assertTrue(numpy.allclose(z[:, -1], hs))
+        # Volume of the revolved meridian
+        v = numpy.sum(numpy.pi * (r[:, 1:] ** 2 + r[:, :-1] ** 2) / 2
+                      * numpy.diff(z, axis=-1), axis=-1)
+        self.assertTrue(numpy.allclose(v, 3.0e-10, rtol=1e-5))
+        # Widest point is the equator
+        r1, *_ = gd.solve_heights(hs)
+        self.assertTrue(numpy.allclose(r.max(axis=-1), r1, rtol=1e-5))
+
+    def test_angles(self):
+        with self.assertRaises(ValueError):
+            GravityDroplet(3.0e-10, radians(80), radians(165))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.hysteresis import Pinning, pinned, advancing, \
+    receding
+from droplet_pressure.schedule import Schedule
+import numpy
+import unittest
+
+
+class TestHysteresis(unittest.TestCase):
+    def setUp(self):
+        self.drop = Droplet(initial_volume=3.0e-10,
+                            theta_t=radians(145),
+                            theta_b=radians(165))
+        self.pin = Pinning(self.drop, advancing=radians([150, 170]),
+                           receding=radians([130, 150]))
+
+    def test_free(self):
+        # Without hysteresis the lines slide at the fixed angles
+        pin = Pinning(self.drop,
+                      advancing=radians([145.0001, 165.0001]),
+                      receding=radians([144.9999, 164.9999]))
+        strain = numpy.linspace(0, 0.25, 11)
+        res = pin.run(strain)
+        *_, p = self.drop.solve_heights(self.drop.h0 * (1 - strain))
+        self.assertTrue(numpy.allclose(res["pressure"], p, rtol=1e-5))
+
+    def test_pinned(self):
+        res = self.pin.run(numpy.linspace(0, 0.01, 5))
+        self.assertTrue(numpy.all(res["mode_t"] == pinned))
+        self.assertTrue(numpy.all(res["mode_b"] == pinned))
+        self.assertTrue(numpy.allclose(res["a_t"], res["a_t"][0]))
+        self.assertTrue(numpy.allclose(res["a_b"], res["a_b"][0]))
+        # Angles grow under compression
+        self.assertTrue(numpy.all(numpy.diff(res["theta_t"]) > 0))
+
+    def test_cycles(self):
+        s = Schedule().ramp(0.2, 20).ramp(0, 20).repeat(3)
+        res = self.pin.run(s.strains)
+        self.assertIn(advancing, res["mode_b"])
+        self.assertIn(receding, res["mode_b"])
+        # Loading above unloading at the same strain
+        self.assertGreater(res["stress"][10], res["stress"][30])
+        # Same loop after the first cycle
+        self.assertTrue(numpy.allclose(res["stress"][41:81],
+                                       res["stress"][81:121]))
+        # Angles stay within the thresholds
+        self.assertTrue(numpy.all(res["theta_b"] <= radians(170) + 1e-9))
+        self.assertTrue(numpy.all(res["theta_b"] >= radians(150) - 1e-9))
+
+    def test_period(self):
+        # Tiled cycles agree with solving every step
+        s = Schedule().ramp(0.2, 20).ramp(0, 20).repeat(20)
+        res = self.pin.run(s.strains)
+        tiled = self.pin.run(s.strains, period=s.period)
+        for f in res.dtype.names:
+            self.assertTrue(numpy.allclose(tiled[f], res[f], rtol=1e-9))
+        # Not tiled when the strains do not repeat
+        strain = s.strains.copy()
+        strain[-5:] = 0.1
+        res = self.pin.run(strain, period=s.period)
+        self.assertTrue(numpy.allclose(res["strain"], strain))
+
+    def test_large_steps(self):
+        # Steps beyond the pinned range switch to sliding
+        res = self.pin.run([0, 0.1])
+        self.assertEqual(res["mode_b"][1], advancing)
+        self.assertAlmostEqual(res["theta_b"][1], radians(170), places=12)
+        res = self.pin.run(Schedule().sine(0.1, 8, cycles=3).strains)
+        for t, a, m, adv, rec in (("theta_t", "a_t", "mode_t", 150, 130),
+                                  ("theta_b", "a_b", "mode_b", 170, 150)):
+            theta = res[t][1:]
+            da = numpy.diff(res[a])
+            mode = res[m][1:]
+            self.assertTrue(numpy.all(numpy.abs(da[mode == pinned])
+                                      < 1e-15))
+            self.assertTrue(numpy.all(da[mode == advancing] >= 0))
+            self.assertTrue(numpy.all(da[mode == receding] <= 0))
+            self.assertTrue(numpy.allclose(theta[mode == advancing],
+                                           radians(adv)))
+            self.assertTrue(numpy.allclose(theta[mode == receding],
+                                           radians(rec)))
+
+    def test_paths(self):
+        strain = numpy.stack((numpy.linspace(0, 0.2, 15),
+                              numpy.linspace(0, 0.1, 15)), axis=-1)
+        res = self.pin.run(strain)
+        self.assertEqual(res.shape, (15, 2))
+        for i in range(2):
+            single = self.pin.run(strain[:, i])
+            self.assertTrue(numpy.allclose(res["stress"][:, i],
+                                           single["stress"]))
+
+    def test_range(self):
+        with self.assertRaises(ValueError):
+            Pinning(self.drop, advancing=radians(160),
+                    receding=radians(150))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+modules = ("droplet", "sweep", "schedule", "parallel", "cache",
+           "tables", "export", "stats", "report", "shape_keys", "cli",
+           "gravity", "hysteresis")
+
+
+class TestImport(unittest.TestCase):
+    def test_no_scipy(self):
+        """Only numpy is needed at import time
+        """
+        code = "; ".join(["import sys"]
+                         + ["import droplet_pressure." + m for m in modules]
+                         + ["print(sorted(m for m in sys.modules "
+                            "if m.split('.')[0] in "
+                            "('scipy', 'matplotlib')))"])
+        out = subprocess.check_output([sys.executable, "-c", code],
+                                      cwd=root)
+        self.assertEqual(out.decode().strip(), "[]")
+
+    def test_fallback(self):
+        # scipy is loaded on demand
+        from droplet_pressure.droplet import fsolve_r1, radians
+        r1 = fsolve_r1(1e-3, 3.0e-10, radians(145), radians(165))
+        self.assertTrue(r1 > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
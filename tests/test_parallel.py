@@ -0,0 +1,31 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.parallel import SweepExecutor
+import numpy
+import unittest
+
+
+class TestParallel(unittest.TestCase):
+    def test_ordered(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        hs = numpy.linspace(d.h0, d.h0 * 0.75, 1001)
+        calls = []
+        ex = SweepExecutor(chunk_size=100, workers=2,
+                           progress=lambda done, total:
+                           calls.append((done, total)))
+        res = ex.run(d.v0, d.theta_t, d.theta_b, hs)
+        self.assertEqual(ex.chunks_done, 11)
+        self.assertEqual(ex.points_done, 1001)
+        self.assertEqual(calls[-1], (1001, 1001))
+        self.assertTrue(numpy.array_equal(res["h"], hs))
+        _, _, _, _, p = d.solve_heights(hs)
+        self.assertTrue(numpy.allclose(res["pressure"], p))
+        # Same result in a single process
+        serial = SweepExecutor(chunk_size=333, workers=1).run(
+            d.v0, d.theta_t, d.theta_b, hs)
+        self.assertTrue(numpy.array_equal(serial, res))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+from droplet_pressure.report import logger, set_verbosity, FrameRecorder, \
+    Progress
+import io
+import logging
+import numpy
+import os
+import tempfile
+import unittest
+
+
+class TestReport(unittest.TestCase):
+    def tearDown(self):
+        for handler in list(logger.handlers):
+            if getattr(handler, "_verbosity", False):
+                logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+
+    def test_quiet(self):
+        # Silent by default
+        self.assertFalse(logger.isEnabledFor(logging.INFO))
+        p = Progress(10)
+        for i in range(10):
+            p(i + 1)
+        self.assertEqual(p.messages, 0)
+        self.assertEqual(p.done, 10)
+
+    def test_progress(self):
+        stream = io.StringIO()
+        set_verbosity(1, stream=stream)
+        p = Progress(1000, interval=60, name="frames")
+        for i in range(1000):
+            p(i + 1)
+        # First and last update only
+        self.assertEqual(p.messages, 2)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("frames: 1000 / 1000", lines[-1])
+
+    def test_recorder(self):
+        fd, f_name = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            with FrameRecorder(("frame", "h"), f_name=f_name) as rec:
+                for i in range(5):
+                    rec.record(i, 0.5 * i)
+                # Nothing written before the end
+                self.assertEqual(os.path.getsize(f_name), 0)
+            data = numpy.loadtxt(f_name, delimiter=",")
+            self.assertTrue(numpy.allclose(data, rec.as_array()))
+            self.assertEqual(data.shape, (5, 2))
+        finally:
+            os.remove(f_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
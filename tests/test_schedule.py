@@ -0,0 +1,41 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.schedule import Schedule
+import numpy
+import unittest
+
+
+class TestSchedule(unittest.TestCase):
+    def test_segments(self):
+        s = Schedule().ramp(0.2, 4).hold(2).ramp(0, 4)
+        self.assertEqual(len(s), 11)
+        self.assertTrue(numpy.allclose(s.strains[:5],
+                                       [0, 0.05, 0.1, 0.15, 0.2]))
+        self.assertTrue(numpy.all(s.strains[5:7] == 0.2))
+        self.assertEqual(s.current, 0)
+        self.assertIsNone(s.period)
+        s.repeat(3)
+        self.assertEqual(len(s), 31)
+        self.assertEqual(s.period, 10)
+        s.sine(0.1, 8, cycles=2)
+        self.assertEqual(len(s), 47)
+        self.assertIsNone(s.period)
+        self.assertEqual(s.current, 0)
+        self.assertAlmostEqual(s.strains[-7], 0.1)
+
+    def test_evaluate(self):
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        s = Schedule().ramp(0.25, 10).hold(3).ramp(0, 10).repeat(500)
+        strain, _ = s.unique()
+        # Ramps up and down share their states
+        self.assertEqual(len(strain), 11)
+        res = s.evaluate(d)
+        self.assertEqual(res.shape, (len(s),))
+        _, _, _, _, p = d.solve_heights(d.h0 * (1 - s.strains))
+        self.assertTrue(numpy.allclose(res["pressure"], p, rtol=1e-10))
+        self.assertTrue(numpy.allclose(res["stress"][::23], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+from droplet_pressure.shape_keys import set_points, add_shape_keys
+import numpy
+import unittest
+
+
+class Point(object):
+    def __init__(self, co):
+        self.co = tuple(co)
+
+
+class Collection(list):
+    """Stand-in for bpy_prop_collection
+    """
+
+    def foreach_get(self, attr, seq):
+        width = len(getattr(self[0], attr))
+        for i, item in enumerate(self):
+            seq[i * width: (i + 1) * width] = getattr(item, attr)
+
+    def foreach_set(self, attr, seq):
+        width = len(getattr(self[0], attr))
+        if len(seq) != len(self) * width:
+            raise RuntimeError("sequence size mismatch")
+        for i, item in enumerate(self):
+            setattr(item, attr, tuple(seq[i * width: (i + 1) * width]))
+
+
+class Key(object):
+    def __init__(self, name, points):
+        self.name = name
+        self.data = Collection(Point(p.co[:3]) for p in points)
+
+
+class CurveObject(object):
+    def __init__(self, n):
+        self.points = Collection(Point((0, 0, 0, 1)) for _ in range(n))
+        self.keys = []
+
+    def shape_key_add(self, name="Key", from_mix=True):
+        self.keys.append(Key(name, self.points))
+        return self.keys[-1]
+
+
+class TestShapeKeys(unittest.TestCase):
+    def test_bulk(self):
+        frames = numpy.random.RandomState(0).rand(5, 8, 3)
+        # Blender adds points to the one of a new spline
+        obj = CurveObject(9)
+        set_points(obj.points, frames[0])
+        for j, v in enumerate(frames[0]):
+            self.assertTrue(numpy.allclose(obj.points[j].co,
+                                           tuple(v) + (1,)))
+        self.assertEqual(obj.points[-1].co, (0, 0, 0, 1))
+        keys = add_shape_keys(obj, frames)
+        self.assertEqual([k.name for k in keys],
+                         ["step-{}".format(i) for i in range(5)])
+        for key, verts in zip(keys, frames):
+            co = numpy.array([p.co for p in key.data])
+            self.assertTrue(numpy.allclose(co[:8], verts))
+            self.assertTrue(numpy.allclose(co[8], 0))
+        with self.assertRaises(ValueError):
+            set_points(obj.points, numpy.zeros((10, 3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+from droplet_pressure.droplet import Droplet, radians, newton_r1, fsolve_r1
+from droplet_pressure.stats import SolverStats, profile, add_hook, \
+    remove_hook, collect
+import numpy
+import unittest
+
+
+class TestStats(unittest.TestCase):
+    def test_profile(self):
+        theta_t, theta_b = radians(145), radians(165)
+        d = Droplet(initial_volume=3.0e-10, theta_t=theta_t,
+                    theta_b=theta_b)
+        hs = numpy.linspace(d.h0, d.h0 * 0.5, 10)
+        with profile() as stats:
+            d.solve_heights(hs)
+            newton_r1(hs, d.v0, theta_t, theta_b)
+            fsolve_r1(hs[0], d.v0, theta_t, theta_b)
+        self.assertEqual(stats.solvers["closed_form"]["points"], 10)
+        self.assertEqual(stats.solvers["newton"]["calls"], 1)
+        self.assertGreater(stats.solvers["newton"]["evaluations"], 10)
+        self.assertGreater(stats.solvers["fsolve"]["evaluations"], 0)
+        self.assertEqual(stats.total("failures"), 0)
+        self.assertIn("newton", stats.report())
+        # Nothing is recorded outside of the block
+        d.solve_heights(hs)
+        self.assertEqual(stats.solvers["closed_form"]["calls"], 1)
+
+    def test_droplet(self):
+        stats = SolverStats()
+        d = Droplet(initial_volume=3.0e-10, theta_t=radians(145),
+                    theta_b=radians(165), stats=stats)
+        d.h = d.h0 * 0.9
+        d.r1
+        # Only r1 at h is solved, h0 is closed form
+        self.assertEqual(stats.solvers["closed_form"]["calls"], 1)
+        d.get_height_for_pressure(d.get_curve_pressure())
+        self.assertGreater(stats.solvers["closed_form"]["calls"], 2)
+        # Failed fsolve is counted
+        with profile() as failed:
+            fsolve_r1(1e-3, 3.0e-10, radians(145), radians(165),
+                      x0=numpy.nan)
+        self.assertEqual(failed.total("failures"), 1)
+        # Nested activation records each solve once
+        stats.reset()
+        d.h = d.h0 * 0.8
+        with collect(stats):
+            d.r1
+        self.assertEqual(stats.solvers["closed_form"]["calls"], 1)
+
+    def test_hook(self):
+        calls = []
+
+        def hook(solver, info):
+            calls.append((solver, info["points"]))
+        add_hook(hook)
+        try:
+            newton_r1([1e-4, 2e-4], 3.0e-10, radians(145), radians(165))
+        finally:
+            remove_hook(hook)
+        newton_r1([1e-4, 2e-4], 3.0e-10, radians(145), radians(165))
+        self.assertEqual(calls, [("newton", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.sweep import sweep
+import numpy
+import unittest
+
+
+class TestSweep(unittest.TestCase):
+    def test_grid(self):
+        volumes = [1.0e-10, 3.0e-10]
+        thetas = radians([130, 150, 180])
+        strains = numpy.linspace(0, 0.25, 4)
+        res = sweep(volumes, thetas, radians(165), strain=strains)
+        self.assertEqual(res.shape, (2, 3, 1, 1, 4))
+        d = Droplet(initial_volume=volumes[1],
+                    theta_t=thetas[1],
+                    theta_b=radians(165))
+        d.h = d.h0 * (1 - strains[2])
+        row = res[1, 1, 0, 0, 2]
+        self.assertAlmostEqual(row["h0"] / d.h0, 1.0, places=10)
+        self.assertAlmostEqual(row["r1"] / d.r1, 1.0, places=8)
+        self.assertAlmostEqual(row["stress"] / d.get_delta_stress(),
+                               1.0, places=6)
+        self.assertAlmostEqual(row["stress_gravity"]
+                               / d.get_delta_stress(gravity=True),
+                               1.0, places=6)
+        # Zero strain means zero stress
+        self.assertTrue(numpy.allclose(res["stress"][..., 0], 0))
+
+    def test_list(self):
+        strains = numpy.linspace(0, 0.25, 5)
+        res = sweep(3.0e-10, radians(145), radians(165),
+                    strain=strains, grid=False)
+        self.assertEqual(res.shape, (5,))
+        d = Droplet(initial_volume=3.0e-10,
+                    theta_t=radians(145),
+                    theta_b=radians(165))
+        _, _, _, _, p = d.solve_heights(d.h0 * (1 - strains))
+        self.assertTrue(numpy.allclose(res["pressure"], p))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+from droplet_pressure.droplet import Droplet, radians
+from droplet_pressure.tables import StressTable
+import numpy
+import os
+import tempfile
+import unittest
+
+
+class TestTables(unittest.TestCase):
+    def setUp(self):
+        self.table = StressTable.build(radians(numpy.linspace(120, 180, 31)),
+                                       radians(numpy.linspace(150, 180, 16)),
+                                       numpy.linspace(0, 0.3, 31))
+
+    def test_rescale(self):
+        table = self.table
+        self.assertLess(max(table.error.values()), 1e-3)
+        for vol, gamma in ((3.0e-10, 0.485), (1.0e-9, 0.072)):
+            d = Droplet(initial_volume=vol,
+                        theta_t=radians(145),
+                        theta_b=radians(165),
+                        gamma=gamma)
+            for strain in (0.0, 0.13, 0.25):
+                d.h = d.h0 * (1 - strain)
+                p = table.get_curve_pressure(vol, d.theta_t, d.theta_b,
+                                             strain, gamma=gamma,
+                                             gravity=True)
+                ref = d.get_curve_pressure(gravity=True)
+                self.assertLess(abs(p / ref - 1), table.error["r1"] * 2)
+
+    def test_save(self):
+        f_name = os.path.join(tempfile.mkdtemp(), "table.npz")
+        self.table.save(f_name)
+        table = StressTable.load(f_name)
+        self.assertEqual(table.error, self.table.error)
+        args = (radians(133), radians(171), 0.07)
+        self.assertEqual(table.interp("r1", *args),
+                         self.table.interp("r1", *args))
+        with self.assertRaises(ValueError):
+            table.interp("r1", radians(100), radians(171), 0.07)
+
+
+if __name__ == "__main__":
+    unittest.main()